@@ -0,0 +1,132 @@
+# ast_cache.py
+# Binary cache of parsed programs, stored next to the source as FILE.bas.astc.
+#
+# File layout: MAGIC, 16-byte AST version stamp, 32-byte SHA-256 of the source,
+# then a marshal payload. Nodes are stored as flat tuples (layout index, field
+# values...) with one shared table of (class name, field names) layouts.
+# The version stamp hashes FORMAT_VERSION and the modules that decide the tree
+# (astt.py, tokens.py, lexer.py, node_factory.py and parser.py), so caches
+# written before any change to them are ignored and rebuilt.
+
+import gc
+import hashlib
+import marshal
+import os
+
+import astt
+import lexer
+import node_factory
+import parser
+import tokens
+from lexer import Lexer
+from parser import Parser
+
+MAGIC = b'BASTC'
+FORMAT_VERSION = 1
+CACHE_SUFFIX = '.astc'
+
+# Modules whose source is part of the version stamp
+VERSIONED_MODULES = (astt, tokens, lexer, node_factory, parser)
+
+
+def _ast_version():
+    digest = hashlib.sha256(str(FORMAT_VERSION).encode())
+    for module in VERSIONED_MODULES:
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.digest()[:16]
+
+
+AST_VERSION = _ast_version()
+HEADER_SIZE = len(MAGIC) + 16 + 32
+
+
+def cache_path(source_path):
+    return source_path + CACHE_SUFFIX
+
+
+def dumps(program, source_hash):
+    layouts = []
+    layout_index = {}
+
+    def encode(value):
+        if isinstance(value, astt.ASTNode):
+            fields = vars(value)
+            key = (type(value).__name__, tuple(fields))
+            index = layout_index.get(key)
+            if index is None:
+                index = layout_index[key] = len(layouts)
+                layouts.append(key)
+            return (index,) + tuple(encode(v) for v in fields.values())
+        if isinstance(value, list):
+            return [encode(v) for v in value]
+        return value
+
+    tree = encode(program)
+    return MAGIC + AST_VERSION + source_hash + marshal.dumps((layouts, tree))
+
+
+def loads(data, source_hash=None):
+    """Decodes a cache file, returning None if it is stale or not a cache."""
+    if data[:len(MAGIC)] != MAGIC or data[len(MAGIC):len(MAGIC) + 16] != AST_VERSION:
+        return None
+    if source_hash is not None and data[len(MAGIC) + 16:HEADER_SIZE] != source_hash:
+        return None
+    layouts, tree = marshal.loads(data[HEADER_SIZE:])
+    classes = [(getattr(astt, name), fields) for name, fields in layouts]
+    new = object.__new__
+
+    def decode(value):
+        cls, fields = classes[value[0]]
+        node = new(cls)
+        attrs = node.__dict__
+        i = 1
+        for name in fields:
+            v = value[i]
+            i += 1
+            t = type(v)
+            if t is tuple:
+                v = decode(v)
+            elif t is list:
+                v = [decode(x) if type(x) is tuple else x for x in v]
+            attrs[name] = v
+        return node
+
+    # Building a large tree triggers many pointless collections; the
+    # decoded nodes contain no reference cycles.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return decode(tree)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def parse_source(basic_code):
+    tokens = Lexer(basic_code).tokenize()
+    return Parser(tokens).parse()
+
+
+def load_or_parse(source_path):
+    """Returns the Program for a BASIC file, using the cache when it matches the source."""
+    with open(source_path, 'rb') as f:
+        raw = f.read()
+    source_hash = hashlib.sha256(raw).digest()
+    path = cache_path(source_path)
+
+    try:
+        with open(path, 'rb') as f:
+            program = loads(f.read(), source_hash)
+        if program is not None:
+            return program
+    except (OSError, ValueError, EOFError, TypeError, IndexError, AttributeError):
+        pass
+
+    program = parse_source(raw.decode())
+    try:
+        with open(path, 'wb') as f:
+            f.write(dumps(program, source_hash))
+    except OSError:
+        pass  # A read-only source directory just means no cache
+    return program
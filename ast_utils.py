@@ -0,0 +1,135 @@
+# ast_utils.py
+
+from astt import *
+
+# Operator token values as produced by the parser (see tokens.TOKEN_TYPES)
+ARITHMETIC_OPS = ('+', '-', '*', '/')
+COMPARISON_OPS = ('=', '<>', '<', '<=', '>', '>=')
+
+# Size of an array used without DIM, as in classic BASIC (indexes 0..10)
+DEFAULT_ARRAY_SIZE = 10
+
+# BASIC operator -> C operator
+C_OPERATORS = {
+    '+': '+', '-': '-', '*': '*', '/': '/',
+    '=': '==', '<>': '!=', '<': '<', '<=': '<=',
+    '>': '>', '>=': '>=',
+}
+
+
+def c_div(a, b):
+    """Integer division truncating toward zero, like C."""
+    q = abs(a) // abs(b)
+    return q if (a < 0) == (b < 0) else -q
+
+
+def walk_statements(statements):
+    """Yields every statement in a list, descending into IF branches and FOR bodies."""
+    for stmt in statements:
+        if isinstance(stmt, LabeledStatement):
+            stmt = stmt.statement
+        yield stmt
+        if isinstance(stmt, IfStatement):
+            yield from walk_statements([stmt.then_branch])
+            if stmt.else_branch:
+                yield from walk_statements([stmt.else_branch])
+        elif isinstance(stmt, (ForStatement, WhileStatement, DoWhileStatement)):
+            yield from walk_statements(stmt.body)
+        elif isinstance(stmt, BlockStatement):
+            yield from walk_statements(stmt.statements)
+
+
+def target_name(target):
+    """Name of what a LET/INPUT target writes: the variable, or NAME() for any
+    element of array NAME, so arrays never clash with scalars of the same name."""
+    if isinstance(target, ArrayRef):
+        return target.name + '()'
+    return target.name
+
+
+def expr_variables(expr):
+    """Returns the set of variable names read by an expression (NAME() for array elements)."""
+    if isinstance(expr, Variable):
+        return {expr.name}
+    if isinstance(expr, ArrayRef):
+        return {target_name(expr)} | expr_variables(expr.index)
+    if isinstance(expr, BinaryOp):
+        return expr_variables(expr.left) | expr_variables(expr.right)
+    return set()
+
+
+def assigned_variables(statements):
+    """Returns (names, opaque) for a statement list.
+
+    names holds every variable the statements may assign. opaque is True when
+    they contain a GOSUB, whose subroutine may assign anything.
+    """
+    names = set()
+    opaque = False
+    for stmt in walk_statements(statements):
+        if isinstance(stmt, (LetStatement, InputStatement)):
+            names.add(target_name(stmt.variable))
+        elif isinstance(stmt, ForStatement):
+            names.add(stmt.var.name)
+        elif isinstance(stmt, GosubStatement):
+            opaque = True
+    return names, opaque
+
+
+def constant_value(expr):
+    """Folds an expression made only of numbers, returning None if it is not constant."""
+    if isinstance(expr, Number):
+        return expr.value
+    if isinstance(expr, BinaryOp):
+        left = constant_value(expr.left)
+        right = constant_value(expr.right)
+        if left is None or right is None:
+            return None
+        if expr.op == '+':
+            return left + right
+        if expr.op == '-':
+            return left - right
+        if expr.op == '*':
+            return left * right
+        if expr.op == '/':
+            return c_div(left, right) if right != 0 else None
+        if expr.op == '=':
+            return int(left == right)
+        if expr.op == '<>':
+            return int(left != right)
+        if expr.op == '<':
+            return int(left < right)
+        if expr.op == '<=':
+            return int(left <= right)
+        if expr.op == '>':
+            return int(left > right)
+        if expr.op == '>=':
+            return int(left >= right)
+    return None
+
+
+def fold_constants(expr):
+    """Returns expr with every constant subexpression replaced by its Number.
+    Unchanged subtrees are reused, never modified."""
+    if isinstance(expr, ArrayRef):
+        index = fold_constants(expr.index)
+        return expr if index is expr.index else ArrayRef(expr.name, index)
+    if not isinstance(expr, BinaryOp):
+        return expr
+    value = constant_value(expr)
+    if value is not None:
+        return Number(value)
+    left = fold_constants(expr.left)
+    right = fold_constants(expr.right)
+    if left is expr.left and right is expr.right:
+        return expr
+    return BinaryOp(left, expr.op, right)
+
+
+def jump_targets(statements):
+    """Returns the set of line numbers targeted by GOTO or GOSUB anywhere in the statements."""
+    targets = set()
+    for stmt in walk_statements(statements):
+        if isinstance(stmt, (GotoStatement, GosubStatement)):
+            targets.add(stmt.target)
+    return targets
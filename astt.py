@@ -3,7 +3,10 @@
 # ---------- Base Node ----------
 
 class ASTNode:
-    pass
+    # Set by the parser on statements: the BASIC line number they were written
+    # under and the 1-based line of the source file
+    line = None
+    source_line = None
 
 # ---------- Expression Nodes ----------
 
@@ -37,6 +40,14 @@ class BinaryOp(ASTNode):
     def __repr__(self):
         return f"BinaryOp({self.left}, {self.op}, {self.right})"
 
+class ArrayRef(ASTNode):
+    def __init__(self, name, index):
+        self.name = name
+        self.index = index
+
+    def __repr__(self):
+        return f"ArrayRef({self.name}({self.index}))"
+
 # ---------- Statement Nodes ----------
 
 class LetStatement(ASTNode):
@@ -117,6 +128,48 @@ class RemStatement(ASTNode):
     def __repr__(self):
         return f"REM({self.comment})"
 
+class DimStatement(ASTNode):
+    def __init__(self, arrays):
+        self.arrays = arrays  # Array name -> size; valid indexes are 0..size
+
+    def __repr__(self):
+        return f"DIM({', '.join(f'{name}({size})' for name, size in self.arrays.items())})"
+
+# ---------- Structured Control Flow ----------
+# Not produced by the parser; the structuring pass (structurer.py) builds these
+# from GOTO-based loops and branches. Bodies are lists of LabeledStatement.
+
+class BlockStatement(ASTNode):
+    def __init__(self, statements):
+        self.statements = statements
+
+    def __repr__(self):
+        return f"Block({self.statements})"
+
+class WhileStatement(ASTNode):
+    def __init__(self, condition, body):
+        self.condition = condition
+        self.body = body
+
+    def __repr__(self):
+        return f"While({self.condition}, Body={self.body})"
+
+class DoWhileStatement(ASTNode):
+    def __init__(self, body, condition):
+        self.body = body
+        self.condition = condition
+
+    def __repr__(self):
+        return f"DoWhile(Body={self.body}, {self.condition})"
+
+class BreakStatement(ASTNode):
+    def __repr__(self):
+        return "Break()"
+
+class ContinueStatement(ASTNode):
+    def __repr__(self):
+        return "Continue()"
+
 # ---------- Program and Line ----------
 
 class LabeledStatement(ASTNode):
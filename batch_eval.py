@@ -0,0 +1,330 @@
+# batch_eval.py
+# Runs one BASIC program over many input rows at once with NumPy.
+#
+# Every variable holds one int64 value per row. Expressions are evaluated as
+# array operations over all rows; control flow is handled with masks: IF runs
+# each branch for the rows whose condition holds, loops repeat while any row
+# is still iterating, END retires rows. The program is first passed through
+# the inliner, the loop unroller and the structurer, so GOTO loops and simple
+# GOSUBs are fine; programs that still jump afterwards are rejected.
+#
+# Usage: python batch_eval.py FILE.bas ROWS.csv   (one row of INPUT values per
+#        line; prints one CSV line per row with the numbers the row PRINTed)
+
+import sys
+
+try:
+    import numpy as np
+except ImportError:  # Optional: only batch evaluation needs it
+    np = None
+
+from astt import *
+from ast_utils import DEFAULT_ARRAY_SIZE, walk_statements
+from inliner import Inliner
+from lexer import Lexer
+from parser import Parser
+from structurer import Structurer
+from unroller import LoopUnroller
+
+# Iterations after which a loop is assumed not to terminate
+MAX_ITERATIONS = 1000000
+
+
+class BatchResult:
+    """What a batch run printed, in execution order.
+
+    outputs is a list of (value, mask) pairs, one per PRINT executed: value
+    is an int64 array with an entry per row, or the string printed, and mask
+    tells which rows printed it.
+    """
+
+    def __init__(self, rows, outputs):
+        self.rows = rows
+        self.outputs = outputs
+
+    def columns(self):
+        """The numbers printed, one masked array per PRINT executed."""
+        return [np.ma.masked_array(value, mask=~mask)
+                for value, mask in self.outputs if not isinstance(value, str)]
+
+    def text(self, row):
+        """The standard output one row would have produced, like the compiled program's."""
+        parts = []
+        for value, mask in self.outputs:
+            if mask[row]:
+                parts.append(value if isinstance(value, str) else f"{value[row]}\n")
+        return "".join(parts)
+
+
+class _Loop:
+    def __init__(self, rows):
+        self.broken = np.zeros(rows, dtype=bool)
+        self.continued = np.zeros(rows, dtype=bool)
+
+
+class BatchEvaluator:
+    """Evaluates a Program for a 2-D array of input rows.
+
+    Row r reads its INPUT values from inputs[r] in order; a row that runs
+    out of values leaves the variable unchanged, like a failed scanf.
+    Arithmetic is 64-bit with C's truncating division.
+    """
+
+    def __init__(self, program, max_iterations=MAX_ITERATIONS):
+        if np is None:
+            raise ImportError("batch evaluation requires NumPy (pip install numpy)")
+        program = Structurer().run(LoopUnroller().run(Inliner().run(program)))
+        line = None
+        for stmt in walk_statements(program.statements):
+            # Branches of an IF carry no line of their own; the IF came just before
+            line = getattr(stmt, 'line', None) or line
+            if isinstance(stmt, (GotoStatement, GosubStatement, ReturnStatement)):
+                raise ValueError(f"Line {line}: {type(stmt).__name__} cannot be "
+                                 f"evaluated in batch mode")
+        self.program = program
+        self.max_iterations = max_iterations
+        self.arrays = {}
+        for stmt in walk_statements(program.statements):
+            if isinstance(stmt, DimStatement):
+                for name, size in stmt.arrays.items():
+                    self.arrays[name] = max(size, self.arrays.get(name, 0))
+
+    def run(self, inputs):
+        inputs = np.asarray(inputs, dtype=np.int64)
+        if inputs.ndim == 1:
+            inputs = inputs[:, None]
+        self.inputs = inputs
+        self.rows = rows = len(inputs)
+        self.row_index = np.arange(rows)
+        self.read_pos = np.zeros(rows, dtype=np.int64)
+        self.env = {}
+        self.array_env = {}
+        self.ended = np.zeros(rows, dtype=bool)
+        self.loops = []
+        self.outputs = []
+        self.run_lines(self.program.statements, np.ones(rows, dtype=bool))
+        return BatchResult(rows, self.outputs)
+
+    # --- Statements ---
+
+    def live(self, mask):
+        """Rows of mask still running here: not ended, not past a break or continue."""
+        mask = mask & ~self.ended
+        if self.loops:
+            loop = self.loops[-1]
+            mask &= ~(loop.broken | loop.continued)
+        return mask
+
+    def run_lines(self, items, mask):
+        for item in items:
+            self.execute(item.statement, mask)
+
+    def run_body(self, statements, mask):
+        for stmt in statements:
+            self.execute(stmt, mask)
+
+    def execute(self, stmt, mask):
+        mask = self.live(mask)
+        if not mask.any():
+            return
+        method_name = 'exec_' + type(stmt).__name__
+        visitor = getattr(self, method_name, None)
+        if visitor is None:
+            raise ValueError(f"Line {stmt.line}: {type(stmt).__name__} cannot be evaluated in batch mode")
+        visitor(stmt, mask)
+
+    def exec_LetStatement(self, node, mask):
+        self.store(node.variable, self.eval(node.expr, mask), mask)
+
+    def exec_PrintStatement(self, node, mask):
+        if isinstance(node.expr, String):
+            self.outputs.append((node.expr.value, mask))
+        else:
+            # A copy: the variable's array changes as the program goes on
+            value = np.array(np.broadcast_to(self.eval(node.expr, mask), (self.rows,)))
+            self.outputs.append((value, mask))
+
+    def exec_InputStatement(self, node, mask):
+        # Each row reads its own next value; rows with none left keep the old one
+        width = self.inputs.shape[1]
+        reading = mask & (self.read_pos < width)
+        if not reading.any():
+            return
+        value = self.inputs[self.row_index, np.minimum(self.read_pos, width - 1)]
+        self.store(node.variable, value, reading)
+        self.read_pos += reading
+
+    def exec_IfStatement(self, node, mask):
+        condition = self.eval(node.condition, mask) != 0
+        self.execute(node.then_branch, mask & condition)
+        if node.else_branch:
+            self.execute(node.else_branch, mask & ~condition)
+
+    def exec_BlockStatement(self, node, mask):
+        self.run_lines(node.statements, mask)
+
+    def exec_ForStatement(self, node, mask):
+        name = node.var.name
+        self.store(node.var, self.eval(node.start, mask), mask)
+        loop = _Loop(self.rows)
+        active = mask
+        for _ in range(self.max_iterations):
+            active = active & ~self.ended & ~loop.broken
+            # Like the C loop, end and step are evaluated on every iteration
+            end = self.eval(node.end, active)
+            step = self.eval(node.step, active)
+            var = self.env[name]
+            active &= np.where(step < 0, var >= end, var <= end)
+            if not active.any():
+                return
+            loop.continued[:] = False
+            self.loops.append(loop)
+            self.run_body(node.body, active)
+            self.loops.pop()
+            stepping = active & ~loop.broken & ~self.ended
+            self.store(node.var, self.env[name] + self.eval(node.step, stepping), stepping)
+        raise RuntimeError(f"Line {node.line}: FOR loop did not finish after {self.max_iterations} iterations")
+
+    def exec_WhileStatement(self, node, mask):
+        loop = _Loop(self.rows)
+        active = mask
+        for _ in range(self.max_iterations):
+            active = active & ~self.ended & ~loop.broken
+            active &= self.eval(node.condition, active) != 0
+            if not active.any():
+                return
+            loop.continued[:] = False
+            self.loops.append(loop)
+            self.run_lines(node.body, active)
+            self.loops.pop()
+        raise RuntimeError(f"Line {node.line}: loop did not finish after {self.max_iterations} iterations")
+
+    def exec_DoWhileStatement(self, node, mask):
+        loop = _Loop(self.rows)
+        active = mask
+        for _ in range(self.max_iterations):
+            loop.continued[:] = False
+            self.loops.append(loop)
+            self.run_lines(node.body, active)
+            self.loops.pop()
+            active = active & ~self.ended & ~loop.broken
+            active &= self.eval(node.condition, active) != 0
+            if not active.any():
+                return
+        raise RuntimeError(f"Line {node.line}: loop did not finish after {self.max_iterations} iterations")
+
+    def exec_BreakStatement(self, node, mask):
+        self.loops[-1].broken |= mask
+
+    def exec_ContinueStatement(self, node, mask):
+        self.loops[-1].continued |= mask
+
+    def exec_EndStatement(self, node, mask):
+        self.ended |= mask
+
+    def exec_DimStatement(self, node, mask):
+        pass
+
+    def exec_RemStatement(self, node, mask):
+        pass
+
+    def exec_NextStatement(self, node, mask):
+        pass
+
+    # --- Values ---
+
+    def store(self, target, value, mask):
+        if isinstance(target, ArrayRef):
+            array = self.array(target.name)
+            index = self.index(target, mask)
+            array[self.row_index[mask], index[mask]] = np.broadcast_to(value, (self.rows,))[mask]
+            return
+        old = self.env.get(target.name)
+        if old is None:
+            old = self.env[target.name] = np.zeros(self.rows, dtype=np.int64)
+        np.copyto(old, value, where=mask)
+
+    def array(self, name):
+        array = self.array_env.get(name)
+        if array is None:
+            size = self.arrays.setdefault(name, DEFAULT_ARRAY_SIZE)
+            array = self.array_env[name] = np.zeros((self.rows, size + 1), dtype=np.int64)
+        return array
+
+    def index(self, node, mask):
+        index = np.broadcast_to(self.eval(node.index, mask), (self.rows,))
+        size = self.arrays.get(node.name, DEFAULT_ARRAY_SIZE)
+        bad = mask & ((index < 0) | (index > size))
+        if bad.any():
+            row = int(np.argmax(bad))
+            raise IndexError(f"Row {row}: index {index[row]} out of range for {node.name}(0 to {size})")
+        # Rows outside the mask may hold anything; point them at element 0
+        return np.where(mask, index, 0)
+
+    def eval(self, expr, mask):
+        """Value of expr for every row, as an int64 array (or a scalar for constants).
+        Only rows in mask are checked for division by zero and bad indexes."""
+        if isinstance(expr, Number):
+            return np.int64(expr.value)
+        if isinstance(expr, Variable):
+            value = self.env.get(expr.name)
+            if value is None:
+                value = self.env[expr.name] = np.zeros(self.rows, dtype=np.int64)
+            return value
+        if isinstance(expr, ArrayRef):
+            return self.array(expr.name)[self.row_index, self.index(expr, mask)]
+        if isinstance(expr, BinaryOp):
+            left = self.eval(expr.left, mask)
+            right = self.eval(expr.right, mask)
+            op = expr.op
+            if op == '+':
+                return left + right
+            if op == '-':
+                return left - right
+            if op == '*':
+                return left * right
+            if op == '/':
+                zero = right == 0
+                if np.any(zero & mask):
+                    raise ZeroDivisionError("Division by zero")
+                divisor = np.where(zero, 1, right)
+                # C truncates toward zero; NumPy's // floors
+                quotient = np.abs(left) // np.abs(divisor)
+                return np.where((left < 0) != (divisor < 0), -quotient, quotient)
+            if op == '=':
+                return (left == right).astype(np.int64)
+            if op == '<>':
+                return (left != right).astype(np.int64)
+            if op == '<':
+                return (left < right).astype(np.int64)
+            if op == '<=':
+                return (left <= right).astype(np.int64)
+            if op == '>':
+                return (left > right).astype(np.int64)
+            if op == '>=':
+                return (left >= right).astype(np.int64)
+        raise ValueError(f"Cannot evaluate {expr} in batch mode")
+
+
+def evaluate_source(basic_code, inputs, **options):
+    """Parses basic_code and runs it over the rows of inputs, returning a BatchResult."""
+    program = Parser(Lexer(basic_code).tokenize()).parse()
+    return BatchEvaluator(program, **options).run(inputs)
+
+
+def main(argv):
+    if len(argv) != 2:
+        print("Usage: python batch_eval.py FILE.bas ROWS.csv", file=sys.stderr)
+        return 2
+    with open(argv[0], 'r') as f:
+        basic_code = f.read()
+    rows = np.loadtxt(argv[1], delimiter=',', dtype=np.int64, ndmin=2)
+    result = evaluate_source(basic_code, rows)
+    columns = [(value, mask) for value, mask in result.outputs if not isinstance(value, str)]
+    for row in range(result.rows):
+        print(",".join(str(value[row]) for value, mask in columns if mask[row]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,105 @@
+# bench_batch.py
+# Compares NumPy batch evaluation of a program over many input rows with
+# running it once per row: spawning the compiled binary, or the IR interpreter.
+# The per-row paths are timed on a sample and scaled up to all rows.
+#
+# Usage: python benchmarks/bench_batch.py [rows]
+
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import ir
+from batch_eval import evaluate_source
+from lexer import Lexer
+from main import compile_basic_to_c
+from parser import Parser
+
+# A scoring rule: three inputs, a few branches and a bounded loop
+PROGRAM = """10 INPUT A
+20 INPUT B
+30 INPUT C
+40 LET S = A * 3 - B / 2
+50 IF C > 50 THEN LET S = S + C ELSE LET S = S - C / 4
+60 IF S < 0 THEN LET S = 0 - S
+70 LET T = 0
+80 FOR I = 1 TO 8
+90 IF A - (A / I) * I = 0 THEN LET T = T + I
+100 NEXT I
+110 PRINT S
+120 PRINT T + (S / 10) * 10 - S
+130 END
+"""
+
+SAMPLE = 200
+
+
+def row_input(row):
+    return "".join(f"{value}\n" for value in row)
+
+
+def time_spawn(exe_path, rows):
+    outputs = []
+    start = time.perf_counter()
+    for row in rows:
+        proc = subprocess.run([exe_path], input=row_input(row), capture_output=True, text=True, check=True)
+        outputs.append(proc.stdout)
+    return time.perf_counter() - start, outputs
+
+
+def time_interpreter(rows):
+    program = ir.lower(Parser(Lexer(PROGRAM).tokenize()).parse())
+    outputs = []
+    start = time.perf_counter()
+    for row in rows:
+        out = io.StringIO()
+        ir.IRInterpreter(program, io.StringIO(row_input(row)), out).run()
+        outputs.append(out.getvalue())
+    return time.perf_counter() - start, outputs
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    rows = np.random.RandomState(0).randint(-1000, 1000, size=(count, 3))
+    sample = rows[:SAMPLE]
+
+    start = time.perf_counter()
+    result = evaluate_source(PROGRAM, rows)
+    batch = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as workdir:
+        c_path = os.path.join(workdir, "program.c")
+        exe_path = os.path.join(workdir, "program" + (".exe" if os.name == 'nt' else ".out"))
+        with open(c_path, 'w') as f:
+            f.write(compile_basic_to_c(PROGRAM))
+        subprocess.run(["gcc", "-O2", c_path, "-o", exe_path], check=True)
+        spawn, spawn_outputs = time_spawn(exe_path, sample)
+    interpreter, interpreter_outputs = time_interpreter(sample)
+
+    expected = [result.text(r) for r in range(len(sample))]
+    if spawn_outputs != expected or interpreter_outputs != expected:
+        print("output mismatch between batch and per-row runs")
+        return 1
+
+    print(f"{count} rows (per-row times scaled up from {len(sample)} rows)")
+    results = {
+        'batch': batch,
+        'spawn': spawn * count / len(sample),
+        'interp': interpreter * count / len(sample),
+    }
+    for name, elapsed in results.items():
+        print(f"  {name:<8} {elapsed * 1000:12.1f} ms  {count / elapsed:14.0f} rows/s")
+    print(f"  speedup  {results['spawn'] / batch:12.1f}x over spawning, "
+          f"{results['interp'] / batch:.1f}x over the interpreter")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# bench_intern.py
+# Measures the memory held by the parsed AST of a large generated program,
+# with fresh expression nodes and with the InterningFactory, and checks that
+# both trees compile to the same C.
+#
+# Usage: python benchmarks/bench_intern.py [lines]
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lexer import Lexer
+from main import compile_ast_to_c
+from node_factory import InterningFactory
+from parser import Parser
+
+# Statement shapes in the style of machine-generated BASIC: a few variables
+# and constants recombined over and over
+TEMPLATES = [
+    "LET {a} = {a} + {k}",
+    "LET {b} = ({a} * {k} + {b}) / 2",
+    "IF {a} > {k} THEN LET {a} = {a} - {k}",
+    "LET {c} = {a} * {a} + {b} * {b}",
+    "PRINT {c} - {a} * {k}",
+    "IF {b} < 0 THEN LET {b} = 0 - {b} ELSE LET {b} = {b} + 1",
+]
+VARIABLES = "ABCDEFGH"
+
+
+def generate(lines):
+    out = ["10 LET A = 1", "20 LET B = 2", "30 LET C = 3", "40 LET D = 4",
+           "50 LET E = 5", "60 LET F = 6", "70 LET G = 7", "80 LET H = 8"]
+    for i in range(lines):
+        a, b, c = (VARIABLES[(i + j) % len(VARIABLES)] for j in range(3))
+        line = TEMPLATES[i % len(TEMPLATES)].format(a=a, b=b, c=c, k=i % 10 + 1)
+        out.append(f"{(i + 9) * 10} {line}")
+    out.append(f"{(lines + 9) * 10} END")
+    return "\n".join(out) + "\n"
+
+
+def measure(tokens, factory):
+    """Returns (program, bytes still allocated for it, peak bytes, seconds);
+    the parse time includes the tracing overhead."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    program = Parser(tokens, factory=factory).parse()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return program, current, peak, elapsed
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    tokens = Lexer(generate(lines)).tokenize()
+
+    plain, plain_bytes, plain_peak, plain_time = measure(tokens, None)
+    # Counted while the factory is alive, so its lookup table is included
+    interned, interned_bytes, interned_peak, interned_time = measure(tokens, InterningFactory())
+
+    if compile_ast_to_c(plain) != compile_ast_to_c(interned):
+        print("generated C differs between plain and interned trees")
+        return 1
+
+    print(f"{lines} generated lines, {len(tokens)} tokens")
+    print(f"  {'':<9} {'retained':>10} {'peak':>10} {'parse':>10}")
+    for name, kept, peak, elapsed in (("plain", plain_bytes, plain_peak, plain_time),
+                                      ("interned", interned_bytes, interned_peak, interned_time)):
+        print(f"  {name:<9} {kept / 2**20:8.1f} MB {peak / 2**20:8.1f} MB {elapsed * 1000:7.0f} ms")
+    print(f"  saved    {(1 - interned_bytes / plain_bytes) * 100:9.1f} %")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+# bench_io.py
+# Compares the printf/scanf code path with the buffered fast_io runtime.
+#
+# Usage: python benchmarks/bench_io.py [count]
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import compile_basic_to_c
+
+PROGRAM = """10 INPUT N
+20 LET S = 0
+30 FOR I = 1 TO N
+40 INPUT X
+50 LET S = S + X
+60 PRINT S
+70 NEXT I
+80 PRINT S
+90 END
+"""
+
+
+def build(c_code, workdir, name):
+    c_path = os.path.join(workdir, name + ".c")
+    exe_path = os.path.join(workdir, name + (".exe" if os.name == 'nt' else ".out"))
+    with open(c_path, 'w') as f:
+        f.write(c_code)
+    subprocess.run(["gcc", "-O2", c_path, "-o", exe_path], check=True)
+    return exe_path
+
+
+def best_time(exe_path, input_path, repeat=5):
+    best = None
+    for _ in range(repeat):
+        with open(input_path, 'rb') as stdin, open(os.devnull, 'wb') as stdout:
+            start = time.perf_counter()
+            subprocess.run([exe_path], stdin=stdin, stdout=stdout, check=True)
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as workdir:
+        input_path = os.path.join(workdir, "input.txt")
+        with open(input_path, 'w') as f:
+            f.write(f"{count}\n")
+            f.write("\n".join(str(i * 7 - 3) for i in range(count)))
+            f.write("\n")
+
+        results = {}
+        for name, fast_io in (("printf", False), ("fast_io", True)):
+            exe_path = build(compile_basic_to_c(PROGRAM, fast_io=fast_io), workdir, name)
+            results[name] = best_time(exe_path, input_path)
+
+        print(f"{count} INPUT + PRINT pairs, best of 5 runs")
+        for name, elapsed in results.items():
+            print(f"  {name:<8} {elapsed * 1000:9.1f} ms")
+        print(f"  speedup  {results['printf'] / results['fast_io']:9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
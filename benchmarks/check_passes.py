@@ -0,0 +1,106 @@
+# check_passes.py
+# Regression check for the optimization passes: every program in the corpus
+# and in benchmarks/regressions/ is compiled with each combination of the
+# passes (and node interning) switched on and off, on both backends, built
+# with gcc and run. Its stdout must match the program's golden output (see
+# runtime_bench.py).
+#
+# Usage: python benchmarks/check_passes.py [--gcc-flags=-O2] [NAME...]
+
+import argparse
+import hashlib
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import compile_basic_to_c
+from runtime_bench import CORPUS_DIR, load_corpus, read_golden
+
+REGRESSIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "regressions")
+
+# compile_basic_to_c flags toggled in every combination
+PASSES = ('inline', 'unroll', 'cse', 'structure', 'intern')
+BACKENDS = ('ast', 'ir')
+RUN_TIMEOUT = 10
+
+
+def variants():
+    for backend in BACKENDS:
+        for flags in itertools.product((True, False), repeat=len(PASSES)):
+            yield dict(zip(PASSES, flags), backend=backend)
+
+
+def describe(options):
+    off = [name for name in PASSES if not options[name]]
+    return f"{options['backend']}, " + (f"no {'/'.join(off)}" if off else "all passes")
+
+
+def check_variant(program, basic_code, options, golden, workdir, gcc_flags):
+    """Returns None when the variant prints the golden output, else what went wrong."""
+    try:
+        c_code = compile_basic_to_c(basic_code, **options)
+    except Exception as e:
+        return f"compilation failed: {e}"
+    c_path = os.path.join(workdir, program['name'] + ".c")
+    exe_path = os.path.join(workdir, program['name'] + (".exe" if os.name == 'nt' else ".out"))
+    with open(c_path, 'w') as f:
+        f.write(c_code)
+    build = subprocess.run(["gcc", *gcc_flags, c_path, "-o", exe_path], capture_output=True, text=True)
+    if build.returncode != 0:
+        errors = [line for line in build.stderr.splitlines() if "error:" in line]
+        return "gcc failed: " + (errors[0] if errors else f"exit code {build.returncode}")
+
+    stdin = open(program['stdin'], 'rb') if program['stdin'] else subprocess.DEVNULL
+    try:
+        proc = subprocess.run([exe_path], stdin=stdin, stdout=subprocess.PIPE, timeout=RUN_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        return "timed out"
+    finally:
+        if program['stdin']:
+            stdin.close()
+    if proc.returncode != 0:
+        return f"exit code {proc.returncode}"
+    if hashlib.sha256(proc.stdout).hexdigest() != golden:
+        return "output mismatch"
+    return None
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Check that every pass combination preserves output.")
+    arg_parser.add_argument('names', nargs='*', help="only check these programs")
+    arg_parser.add_argument('--gcc-flags', default="-O0", help="space-separated flags for gcc")
+    args = arg_parser.parse_args()
+
+    programs = load_corpus(CORPUS_DIR) + load_corpus(REGRESSIONS_DIR)
+    if args.names:
+        programs = [p for p in programs if p['name'] in args.names]
+    gcc_flags = args.gcc_flags.split()
+
+    failures = 0
+    checked = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        for program in programs:
+            with open(program['source'], 'r') as f:
+                basic_code = f.read()
+            golden = read_golden(program)
+            if golden is None:
+                print(f"{program['name']}: no golden output")
+                failures += 1
+                continue
+            for options in variants():
+                checked += 1
+                problem = check_variant(program, basic_code, options, golden, workdir, gcc_flags)
+                if problem:
+                    failures += 1
+                    print(f"{program['name']} ({describe(options)}): {problem}")
+
+    print(f"{checked} builds of {len(programs)} programs, {failures} failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
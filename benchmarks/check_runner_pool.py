@@ -0,0 +1,88 @@
+# check_runner_pool.py
+# Regression check for the failure paths of runner_pool.RunnerPool: a worker
+# that breaks mid-request must not be reused, and a replacement that cannot
+# start must not shrink the pool (once every slot is gone, run() would block
+# forever). Needs gcc; uses fork servers where available.
+#
+# Usage: python benchmarks/check_runner_pool.py
+
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from runner_pool import RunnerPool, build
+
+PROGRAM = "10 INPUT N\n20 PRINT N * 2\n30 END\n"
+WORKERS = 2
+# A run that takes longer than this is taken to be blocked on an empty pool
+HANG_SECONDS = 10
+
+
+def run_all(pool, executor, inputs):
+    futures = [executor.submit(pool.run, data) for data in inputs]
+    return [future.result(timeout=HANG_SECONDS) for future in futures]
+
+
+def abort(message):
+    """Exits at once: threads blocked on an empty pool would keep the executor
+    from shutting down."""
+    print(message)
+    os._exit(1)
+
+
+def expect(failures, what, got, wanted):
+    if got != wanted:
+        failures.append(f"{what}: got {got!r}, expected {wanted!r}")
+
+
+def main():
+    failures = []
+    inputs = [f"{i}\n".encode() for i in range(2 * WORKERS)]
+    wanted = [f"{i * 2}\n".encode() for i in range(2 * WORKERS)]
+    with tempfile.TemporaryDirectory() as workdir, ThreadPoolExecutor(WORKERS) as executor:
+        exe_path = build(PROGRAM, workdir)
+        with RunnerPool(exe_path, WORKERS, timeout=5) as pool:
+            expect(failures, "healthy pool", [r.output for r in run_all(pool, executor, inputs)], wanted)
+
+            # A worker that raises after sending its request is out of sync
+            worker = next(w for w in pool.idle.queue if w is not None)
+            original_run = worker.run
+
+            def broken_run(data, timeout):
+                original_run(b"1\n", timeout)
+                raise BrokenPipeError("simulated")
+
+            worker.run = broken_run
+            results = run_all(pool, executor, inputs)
+            expect(failures, "broken worker", sorted(r.status for r in results).count('worker failed'), 1)
+            expect(failures, "after broken worker", [r.output for r in run_all(pool, executor, inputs)], wanted)
+
+            # Replacements cannot start while the binary is missing
+            pool.exe_path = os.path.join(workdir, "missing")
+            for w in pool.idle.queue:
+                if w is not None and hasattr(w, 'process'):
+                    w.process.kill()
+                    w.process.wait()
+            try:
+                results = run_all(pool, executor, inputs * 2)
+                expect(failures, "failed starts", {r.status for r in results} - {'ok'}, {'worker failed'})
+                pool.exe_path = exe_path
+                expect(failures, "after failed starts",
+                       [r.output for r in run_all(pool, executor, inputs)], wanted)
+                expect(failures, "pool size", pool.idle.qsize(), WORKERS)
+            except FutureTimeout:
+                abort("run() blocked: the pool lost its workers")
+            except Exception as e:
+                abort(f"run() raised {e!r} instead of reporting a failed run")
+
+    for failure in failures:
+        print(failure)
+    print(f"runner pool checks: {len(failures)} failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,15 @@
+10 REM Longest Collatz chain, one GOSUB per start value
+20 INPUT N
+30 LET M = 0
+40 FOR I = 1 TO N
+50 LET X = I
+60 GOSUB 500
+70 IF S > M THEN LET M = S
+80 NEXT I
+90 PRINT M
+100 END
+500 LET S = 0
+510 IF X = 1 THEN RETURN
+520 IF X - (X / 2) * 2 = 0 THEN LET X = X / 2 ELSE LET X = 3 * X + 1
+530 LET S = S + 1
+540 GOTO 510
@@ -0,0 +1,21 @@
+10 REM Digit sums through small helper subroutines called in a loop
+20 INPUT N
+30 LET T = 0
+40 LET C = 0
+50 FOR I = 1 TO N
+60 LET X = I
+70 GOSUB 200
+80 LET T = T + D
+90 GOSUB 300
+100 NEXT I
+110 PRINT T
+120 PRINT C
+130 END
+200 LET D = 0
+210 FOR K = 1 TO 7
+220 LET D = D + X - (X / 10) * 10
+230 LET X = X / 10
+240 NEXT K
+250 RETURN
+300 IF D > 30 THEN LET C = C + 1
+310 RETURN
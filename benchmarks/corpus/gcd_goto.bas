@@ -0,0 +1,20 @@
+10 REM Sum of gcd(I, J) for 1 <= I, J <= N, by repeated subtraction in GOTO loops
+20 INPUT N
+30 LET S = 0
+40 LET I = 1
+50 LET J = 1
+60 LET A = I
+70 LET B = J
+80 IF A = B THEN GOTO 130
+90 IF A > B THEN GOTO 120
+100 LET B = B - A
+110 GOTO 80
+120 LET A = A - B
+125 GOTO 80
+130 LET S = S + A
+140 LET J = J + 1
+150 IF J <= N THEN GOTO 60
+160 LET I = I + 1
+170 IF I <= N THEN GOTO 50
+180 PRINT S
+190 END
@@ -0,0 +1,15 @@
+10 REM Prime counting with GOTO loops and trial division
+20 INPUT N
+30 LET C = 0
+40 LET P = 2
+50 IF P > N THEN GOTO 200
+60 LET D = 2
+70 IF D * D > P THEN GOTO 120
+80 IF P - (P / D) * D = 0 THEN GOTO 150
+90 LET D = D + 1
+100 GOTO 70
+120 LET C = C + 1
+150 LET P = P + 1
+160 GOTO 50
+200 PRINT C
+210 END
@@ -0,0 +1,6 @@
+10 REM Output-bound: one PRINT per iteration
+20 INPUT N
+30 FOR I = 1 TO N
+40 PRINT I * 3
+50 NEXT I
+60 END
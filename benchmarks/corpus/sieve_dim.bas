@@ -0,0 +1,19 @@
+10 REM Sieve of Eratosthenes over a DIM array, repeated R times
+20 DIM F(200000)
+30 INPUT R
+40 FOR T = 1 TO R
+50 LET C = 0
+60 FOR I = 2 TO 200000
+70 LET F(I) = 0
+80 NEXT I
+90 FOR I = 2 TO 200000
+100 IF F(I) = 0 THEN GOSUB 200
+110 NEXT I
+120 NEXT T
+130 PRINT C
+140 END
+200 LET C = C + 1
+210 FOR J = I + I TO 200000 STEP I
+220 LET F(J) = 1
+230 NEXT J
+240 RETURN
@@ -0,0 +1,10 @@
+10 REM Nested counted loops with arithmetic in the body
+20 INPUT N
+30 LET S = 0
+40 FOR I = 1 TO N
+50 FOR J = 1 TO N
+60 LET S = S + (I * J - (I * J / 7) * 7)
+70 NEXT J
+80 NEXT I
+90 PRINT S
+100 END
@@ -0,0 +1,8 @@
+5 REM J is read before it is assigned, so its type and bounds check must allow 0
+10 DIM A(10)
+20 LET A(J) = 5
+30 PRINT A(J)
+40 LET J = 3
+50 PRINT A(J)
+60 PRINT J
+70 END
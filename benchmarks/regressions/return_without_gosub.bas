@@ -0,0 +1,9 @@
+5 REM After inlining no GOSUB is left, but a RETURN is
+10 LET X = 4
+20 GOSUB 100
+30 PRINT X
+40 END
+100 LET X = X * 3
+110 RETURN
+120 PRINT 7
+130 RETURN
@@ -0,0 +1,10 @@
+5 REM A GOTO lands on the back edge of a loop that gets structured
+10 LET I = 0
+20 LET I = I + 1
+30 IF I = 2 THEN GOTO 50
+40 PRINT I
+50 GOTO 70
+60 PRINT 999
+70 IF I < 5 THEN GOTO 20
+80 PRINT I
+90 END
@@ -0,0 +1,10 @@
+5 REM A GOTO lands on the GOTO that closes an if/else diamond
+10 INPUT X
+20 IF X > 0 THEN GOTO 50
+30 PRINT 1
+40 GOTO 70
+50 PRINT 2
+55 IF X = 5 THEN GOTO 40
+60 PRINT 3
+70 PRINT 4
+80 END
@@ -0,0 +1,263 @@
+# runtime_bench.py
+# Measures how fast the generated C runs, not how fast the compiler is.
+#
+# Each program in the corpus (NAME.bas, with optional NAME.in for stdin and
+# NAME.out as the golden stdout, or NAME.sha256 with its hash when the output
+# is large) is compiled with every codegen variant, built
+# with gcc at every flag profile and run several times. Reported per build:
+# median wall time, max RSS, binary size and generated C line count.
+#
+# Usage: python benchmarks/runtime_bench.py [--corpus DIR] [--repeat N]
+#            [--variants ast,ir] [--profiles O0,O2] [--update-golden] [--json]
+
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import compile_basic_to_c
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+# Golden outputs larger than this are kept as a SHA-256 instead of the text
+GOLDEN_LIMIT = 64 * 1024
+
+# Codegen variants: name -> keyword arguments for compile_basic_to_c
+VARIANTS = {
+    'ast': {},
+    'ast-fast-io': {'fast_io': True},
+    'ast-goto': {'structure': False},
+    'ast-gosub': {'inline': False},
+    'ast-for': {'unroll': False},
+    'ast-checked': {'elide_bounds_checks': False},
+    'ast-plain': {'inline': False, 'unroll': False, 'cse': False, 'structure': False,
+                  'narrow_types': False, 'hoist_loop_bounds': False, 'elide_bounds_checks': False},
+    'ir': {'backend': 'ir'},
+}
+
+# gcc flag profiles
+PROFILES = {
+    'O0': ['-O0'],
+    'O2': ['-O2'],
+    'O3-native': ['-O3', '-march=native'],
+}
+
+
+def load_corpus(corpus_dir):
+    programs = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if not name.endswith('.bas'):
+            continue
+        base = os.path.join(corpus_dir, name[:-4])
+        programs.append({
+            'name': name[:-4],
+            'source': base + '.bas',
+            'stdin': base + '.in' if os.path.exists(base + '.in') else None,
+            'golden': base + '.out',
+            'golden_hash': base + '.sha256',
+        })
+    return programs
+
+
+def read_golden(program):
+    """SHA-256 hex digest of the expected stdout, or None if there is no golden file."""
+    if os.path.exists(program['golden']):
+        with open(program['golden'], 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    if os.path.exists(program['golden_hash']):
+        with open(program['golden_hash'], 'r') as f:
+            return f.read().split()[0]
+    return None
+
+
+def write_golden(program, stdout):
+    """Stores stdout as NAME.out, or only its hash in NAME.sha256 when it is large."""
+    keep, drop = program['golden'], program['golden_hash']
+    if len(stdout) > GOLDEN_LIMIT:
+        keep, drop = drop, keep
+        data = hashlib.sha256(stdout).hexdigest().encode() + b"\n"
+    else:
+        data = stdout
+    with open(keep, 'wb') as f:
+        f.write(data)
+    if os.path.exists(drop):
+        os.remove(drop)
+
+
+# A child forked straight from Python reports Python's own peak RSS, since
+# ru_maxrss includes the memory the process had before exec. On POSIX the
+# programs are therefore started through this small launcher, which times the
+# run and reports the child's peak RSS on the file named by its first argument.
+LAUNCHER_C = r"""
+#include <stdio.h>
+#include <sys/resource.h>
+#include <sys/time.h>
+#include <sys/wait.h>
+#include <time.h>
+#include <unistd.h>
+
+int main(int argc, char **argv) {
+    struct timespec start, end;
+    struct rusage usage;
+    int status;
+    FILE *report;
+    pid_t pid;
+
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    pid = fork();
+    if (pid == 0) {
+        execv(argv[2], argv + 2);
+        _exit(127);
+    }
+    wait4(pid, &status, 0, &usage);
+    clock_gettime(CLOCK_MONOTONIC, &end);
+
+    report = fopen(argv[1], "w");
+    fprintf(report, "%.9f %ld\n",
+            (end.tv_sec - start.tv_sec) + (end.tv_nsec - start.tv_nsec) / 1e9,
+            (long)usage.ru_maxrss);
+    fclose(report);
+    return WIFEXITED(status) ? WEXITSTATUS(status) : 128 + WTERMSIG(status);
+}
+"""
+
+
+def build_launcher(workdir):
+    if os.name == 'nt':
+        return None
+    c_path = os.path.join(workdir, "launcher.c")
+    exe_path = os.path.join(workdir, "launcher")
+    with open(c_path, 'w') as f:
+        f.write(LAUNCHER_C)
+    if subprocess.run(["gcc", "-O2", c_path, "-o", exe_path]).returncode != 0:
+        return None
+    return exe_path
+
+
+def run_once(exe_path, stdin_path, launcher=None):
+    """Runs a binary once, returning (seconds, max RSS in KiB or None, exit code, stdout bytes)."""
+    stdin = open(stdin_path, 'rb') if stdin_path else subprocess.DEVNULL
+    try:
+        with tempfile.TemporaryFile() as out:
+            if launcher:
+                report = exe_path + ".rusage"
+                proc = subprocess.run([launcher, report, exe_path], stdin=stdin, stdout=out)
+                with open(report, 'r') as f:
+                    elapsed, rss = f.read().split()
+                elapsed, rss = float(elapsed), int(rss)
+                if sys.platform == 'darwin':
+                    rss //= 1024  # bytes there, KiB on Linux
+            else:
+                start = time.perf_counter()
+                proc = subprocess.run([exe_path], stdin=stdin, stdout=out)
+                elapsed = time.perf_counter() - start
+                rss = None
+            out.seek(0)
+            return elapsed, rss, proc.returncode, out.read()
+    finally:
+        if stdin_path:
+            stdin.close()
+
+
+def bench_program(program, variants, profiles, repeat, workdir, update_golden, launcher=None):
+    with open(program['source'], 'r') as f:
+        basic_code = f.read()
+    golden = None if update_golden else read_golden(program)
+
+    results = []
+    for variant in variants:
+        c_code = compile_basic_to_c(basic_code, **VARIANTS[variant])
+        c_path = os.path.join(workdir, f"{program['name']}-{variant}.c")
+        with open(c_path, 'w') as f:
+            f.write(c_code)
+
+        for profile in profiles:
+            exe_path = os.path.join(workdir, f"{program['name']}-{variant}-{profile}.out")
+            build = subprocess.run(["gcc", *PROFILES[profile], c_path, "-o", exe_path],
+                                   capture_output=True, text=True)
+            result = {
+                'program': program['name'], 'variant': variant, 'profile': profile,
+                'c_lines': c_code.count("\n") + 1,
+            }
+            if build.returncode != 0:
+                lines = build.stderr.strip().splitlines() or [f"exit code {build.returncode}"]
+                result['error'] = "gcc failed: " + lines[-1]
+                results.append(result)
+                continue
+
+            times, peak_rss, status = [], None, 'ok'
+            for _ in range(repeat):
+                elapsed, rss, exit_code, stdout = run_once(exe_path, program['stdin'], launcher)
+                times.append(elapsed)
+                if rss is not None:
+                    peak_rss = max(peak_rss or 0, rss)
+                if exit_code != 0:
+                    status = f"exit code {exit_code}"
+                elif golden is None and update_golden:
+                    golden = hashlib.sha256(stdout).hexdigest()
+                    write_golden(program, stdout)
+                elif golden is None:
+                    # A first run is no reference; it may come from a broken build
+                    status = 'no golden'
+                elif hashlib.sha256(stdout).hexdigest() != golden:
+                    status = 'output mismatch'
+
+            result.update({
+                'median_ms': statistics.median(times) * 1000,
+                'max_rss_kb': peak_rss,
+                'binary_bytes': os.path.getsize(exe_path),
+                'status': status,
+            })
+            results.append(result)
+    return results
+
+
+def print_table(results):
+    print(f"{'program':<16} {'variant':<12} {'profile':<10} {'median ms':>10} "
+          f"{'max RSS KiB':>12} {'binary B':>10} {'C lines':>8}  status")
+    for r in results:
+        if 'error' in r:
+            print(f"{r['program']:<16} {r['variant']:<12} {r['profile']:<10} {r['error']}")
+            continue
+        rss = r['max_rss_kb'] if r['max_rss_kb'] is not None else '-'
+        print(f"{r['program']:<16} {r['variant']:<12} {r['profile']:<10} {r['median_ms']:>10.2f} "
+              f"{rss:>12} {r['binary_bytes']:>10} {r['c_lines']:>8}  {r['status']}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark the runtime of generated C programs.")
+    arg_parser.add_argument('--corpus', default=CORPUS_DIR)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--variants', default=','.join(VARIANTS))
+    arg_parser.add_argument('--profiles', default=','.join(PROFILES))
+    arg_parser.add_argument('--update-golden', action='store_true',
+                            help="write NAME.out (or NAME.sha256) from the first successful run")
+    arg_parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = arg_parser.parse_args()
+
+    variants = args.variants.split(',')
+    profiles = args.profiles.split(',')
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        launcher = build_launcher(workdir)
+        for program in load_corpus(args.corpus):
+            results.extend(bench_program(program, variants, profiles, args.repeat,
+                                         workdir, args.update_golden, launcher))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+    failed = [r for r in results if 'error' in r or r['status'] != 'ok']
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+# c_runtime.py
+# C support code emitted into generated programs by CodeGenerator.
+
+# Buffered replacement for printf/scanf, enabled with CodeGenerator(fast_io=True).
+# Output is collected in one large buffer and written with a single fwrite when
+# it fills up, at exit, and before INPUT when stdin is a terminal (so prompts
+# show up before the program waits).
+FAST_IO = r"""
+#include <stdlib.h>
+#include <string.h>
+
+#ifdef _WIN32
+#include <io.h>
+#define rt_getchar() getchar()
+#define rt_isatty(fd) _isatty(fd)
+#else
+#include <unistd.h>
+#define rt_getchar() getchar_unlocked()
+#define rt_isatty(fd) isatty(fd)
+#endif
+
+static char rt_out[1 << 16];
+static size_t rt_out_len = 0;
+static int rt_interactive = -1;
+
+static const char rt_digit_pairs[] =
+    "00010203040506070809101112131415161718192021222324252627282930313233343536373839"
+    "40414243444546474849505152535455565758596061626364656667686970717273747576777879"
+    "8081828384858687888990919293949596979899";
+
+static void rt_flush(void) {
+    if (rt_out_len) {
+        fwrite(rt_out, 1, rt_out_len, stdout);
+        rt_out_len = 0;
+    }
+    fflush(stdout);
+}
+
+static void rt_print_str(const char *s, size_t n) {
+    if (rt_out_len + n > sizeof rt_out) {
+        rt_flush();
+        if (n > sizeof rt_out) {
+            fwrite(s, 1, n, stdout);
+            return;
+        }
+    }
+    memcpy(rt_out + rt_out_len, s, n);
+    rt_out_len += n;
+}
+
+/* Prints v followed by a newline, like printf("%d\n", v) */
+static void rt_print_int(long long v) {
+    char tmp[24];
+    char *p = tmp + sizeof tmp;
+    unsigned long long u = v < 0 ? 0ULL - (unsigned long long)v : (unsigned long long)v;
+    *--p = '\n';
+    while (u >= 100) {
+        const char *pair = rt_digit_pairs + (u % 100) * 2;
+        u /= 100;
+        *--p = pair[1];
+        *--p = pair[0];
+    }
+    if (u >= 10) {
+        const char *pair = rt_digit_pairs + u * 2;
+        *--p = pair[1];
+        *--p = pair[0];
+    } else {
+        *--p = (char)('0' + u);
+    }
+    if (v < 0)
+        *--p = '-';
+    rt_print_str(p, (size_t)(tmp + sizeof tmp - p));
+}
+
+/* Reads a decimal integer into rt_in like scanf("%d"); returns 0 if none is available */
+static long long rt_in;
+
+static int rt_read_int(void) {
+    int c, negative = 0;
+    unsigned long long u = 0;
+    if (rt_interactive < 0)
+        rt_interactive = rt_isatty(0);
+    if (rt_interactive)
+        rt_flush();
+    do {
+        c = rt_getchar();
+    } while (c == ' ' || c == '\t' || c == '\n' || c == '\r');
+    if (c == '-' || c == '+') {
+        negative = c == '-';
+        c = rt_getchar();
+    }
+    if (c < '0' || c > '9') {
+        if (c != EOF)
+            ungetc(c, stdin);
+        return 0;
+    }
+    do {
+        u = u * 10 + (unsigned)(c - '0');
+        c = rt_getchar();
+    } while (c >= '0' && c <= '9');
+    if (c != EOF)
+        ungetc(c, stdin);
+    rt_in = negative ? -(long long)u : (long long)u;
+    return 1;
+}
+"""
+
+# Checked array indexing, used for the accesses the code generator cannot prove
+# to be in range. Index i of an array declared with DIM NAME(size) must lie in
+# 0..size; anything else stops the program with a message on stderr.
+BOUNDS_CHECK = r"""
+#include <stdlib.h>
+
+static long long rt_index(long long i, int size, const char *name) {
+    if (i < 0 || i > size) {
+        fprintf(stderr, "Index %lld out of range for %s(0 to %d)\n", i, name, size);
+        exit(1);
+    }
+    return i;
+}
+"""
+
+
+# Fork server, enabled with CodeGenerator(fork_server=True) (POSIX only). The
+# program's own code becomes basic_main, and main serves requests on stdin:
+# a header line "LENGTH TIMEOUT_MS" followed by LENGTH bytes of input. Each
+# request runs basic_main in a forked child, so every run starts from the
+# same freshly loaded state, with stdin and stdout redirected to two scratch
+# files; a timeout > 0 kills the child with SIGALRM. The reply on stdout is a
+# header line "STATUS LENGTH" (the exit code, or -SIGNAL if the child was
+# killed) followed by the output. stderr is shared with the server.
+FORK_SERVER = r"""
+#include <signal.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/time.h>
+#include <sys/types.h>
+#include <sys/wait.h>
+#include <unistd.h>
+
+static int srv_write_all(int fd, const char *buf, size_t n) {
+    while (n > 0) {
+        ssize_t done = write(fd, buf, n);
+        if (done <= 0)
+            return 0;
+        buf += done;
+        n -= (size_t)done;
+    }
+    return 1;
+}
+
+/* Reads "a b\n" from stdin without stdio, so no request is left in a buffer the child inherits */
+static int srv_read_header(long long *a, long long *b) {
+    char line[64];
+    size_t n = 0;
+    char c;
+    while (read(0, &c, 1) == 1) {
+        if (c == '\n') {
+            line[n] = '\0';
+            return sscanf(line, "%lld %lld", a, b) == 2;
+        }
+        if (n < sizeof line - 1)
+            line[n++] = c;
+    }
+    return 0;
+}
+
+/* Moves exactly n bytes from fd `from` to fd `to` */
+static int srv_copy(int from, int to, long long n) {
+    char buf[1 << 16];
+    while (n > 0) {
+        ssize_t got = read(from, buf, n < (long long)sizeof buf ? (size_t)n : sizeof buf);
+        if (got <= 0 || !srv_write_all(to, buf, (size_t)got))
+            return 0;
+        n -= got;
+    }
+    return 1;
+}
+
+int main(void) {
+    FILE *in_file = tmpfile(), *out_file = tmpfile();
+    int in_fd, out_fd;
+    long long length, timeout_ms;
+    if (!in_file || !out_file) {
+        perror("tmpfile");
+        return 1;
+    }
+    in_fd = fileno(in_file);
+    out_fd = fileno(out_file);
+    while (srv_read_header(&length, &timeout_ms)) {
+        char header[64];
+        int status, code;
+        long long size;
+        pid_t pid;
+
+        if (ftruncate(in_fd, 0) != 0 || ftruncate(out_fd, 0) != 0)
+            return 1;
+        lseek(in_fd, 0, SEEK_SET);
+        lseek(out_fd, 0, SEEK_SET);
+        if (!srv_copy(0, in_fd, length))
+            return 1;
+        lseek(in_fd, 0, SEEK_SET);
+
+        pid = fork();
+        if (pid < 0)
+            return 1;
+        if (pid == 0) {
+            dup2(in_fd, 0);
+            dup2(out_fd, 1);
+            if (timeout_ms > 0) {
+                struct itimerval timer = {{0, 0}, {0, 0}};
+                timer.it_value.tv_sec = timeout_ms / 1000;
+                timer.it_value.tv_usec = (timeout_ms % 1000) * 1000;
+                setitimer(ITIMER_REAL, &timer, NULL);
+            }
+            exit(basic_main());
+        }
+        waitpid(pid, &status, 0);
+        code = WIFEXITED(status) ? WEXITSTATUS(status) : -WTERMSIG(status);
+
+        size = lseek(out_fd, 0, SEEK_END);
+        lseek(out_fd, 0, SEEK_SET);
+        snprintf(header, sizeof header, "%d %lld\n", code, size);
+        if (!srv_write_all(1, header, strlen(header)) || !srv_copy(out_fd, 1, size))
+            return 1;
+    }
+    return 0;
+}
+"""
+
+def profile_runtime(line_numbers, cycles=False):
+    """Per-line execution counters, enabled with CodeGenerator(profile=True).
+
+    PROF_LINE(i) counts one execution of the i-th BASIC line in line_numbers.
+    With cycles=True it also charges the time since the previous PROF_LINE to
+    the line that was running, using the TSC on x86 and clock() elsewhere.
+    The profile is written at exit to $BASIC_PROFILE or basic_profile.txt as
+    'line count cycles' rows.
+    """
+    count = max(len(line_numbers), 1)
+    table = ", ".join(str(n) for n in line_numbers) or "0"
+    if cycles:
+        timer = r"""
+#if defined(__x86_64__) || defined(__i386__)
+#include <x86intrin.h>
+#define prof_clock() __rdtsc()
+#else
+#include <time.h>
+#define prof_clock() ((unsigned long long)clock())
+#endif
+
+static int prof_current = -1;
+static unsigned long long prof_last;
+
+#define PROF_LINE(i) do { \
+    unsigned long long prof_now = prof_clock(); \
+    if (prof_current >= 0) prof_cycles[prof_current] += prof_now - prof_last; \
+    prof_current = (i); \
+    prof_last = prof_now; \
+    prof_counts[i]++; \
+} while (0)
+
+#define PROF_STOP() do { \
+    if (prof_current >= 0) prof_cycles[prof_current] += prof_clock() - prof_last; \
+    prof_current = -1; \
+} while (0)
+"""
+    else:
+        timer = r"""
+#define PROF_LINE(i) (prof_counts[i]++)
+#define PROF_STOP() ((void)0)
+"""
+    return f"""
+#include <stdlib.h>
+
+static const int prof_line_numbers[{count}] = {{{table}}};
+static unsigned long long prof_counts[{count}];
+static unsigned long long prof_cycles[{count}];
+{timer}
+static void prof_dump(void) {{
+    const char *path = getenv("BASIC_PROFILE");
+    FILE *f = fopen(path ? path : "basic_profile.txt", "w");
+    int i;
+    PROF_STOP();
+    if (!f)
+        return;
+    fprintf(f, "# line count cycles\\n");
+    for (i = 0; i < {len(line_numbers)}; i++)
+        fprintf(f, "%d %llu %llu\\n", prof_line_numbers[i], prof_counts[i], prof_cycles[i]);
+    fclose(f);
+}}
+"""
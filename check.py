@@ -0,0 +1,58 @@
+# check.py
+# Validates BASIC sources in a single pass and reports every problem found.
+#
+# Usage: python check.py FILE.bas [FILE.bas ...]
+# Prints a JSON list of diagnostics and exits with status 1 if any are errors.
+
+import json
+import sys
+
+from lexer import Lexer
+from parser import Parser
+from tokens import TOKEN_TYPES
+from diagnostics import Diagnostic
+from ast_utils import walk_statements
+from astt import GotoStatement, GosubStatement
+
+
+def check_basic(basic_code):
+    """Returns the list of Diagnostics for a BASIC source, without stopping at the first error."""
+    diagnostics = []
+    tokens = Lexer(basic_code, diagnostics).tokenize()
+    program = Parser(tokens, diagnostics).parse()
+
+    # Where each BASIC line number is written in the source
+    positions = {}
+    at_line_start = True
+    for token in tokens:
+        if at_line_start and token.type == TOKEN_TYPES['NUMBER']:
+            positions.setdefault(int(token.value), (token.line, token.column))
+        at_line_start = token.type == TOKEN_TYPES['NEWLINE']
+
+    for labeled in program.statements:
+        for stmt in walk_statements([labeled]):
+            if isinstance(stmt, (GotoStatement, GosubStatement)) and stmt.target not in positions:
+                line, column = positions.get(labeled.number, (None, None))
+                diagnostics.append(Diagnostic(f"Jump to undefined line {stmt.target}", line, column))
+
+    diagnostics.sort(key=lambda d: (d.line or 0, d.column or 0))
+    return diagnostics
+
+
+def main(paths):
+    results = []
+    failed = False
+    for path in paths:
+        with open(path, 'r') as f:
+            basic_code = f.read()
+        for diagnostic in check_basic(basic_code):
+            entry = diagnostic.to_dict()
+            entry['file'] = path
+            results.append(entry)
+            failed = failed or diagnostic.severity == 'error'
+    print(json.dumps(results, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
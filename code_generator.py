@@ -1,19 +1,67 @@
 from parser import Parser
 from lexer import Lexer
 from astt import *
+from ast_utils import (C_OPERATORS, COMPARISON_OPS, DEFAULT_ARRAY_SIZE, assigned_variables,
+                       constant_value, expr_variables, jump_targets, target_name, walk_statements)
+from c_runtime import BOUNDS_CHECK, FAST_IO, FORK_SERVER, profile_runtime
+from range_analysis import RangeAnalyzer, C_TYPES, EMPTY, INT_MIN, INT_MAX, choose_type, fits
 
 class CodeGenerator:
-    def __init__(self):
+    def __init__(self, narrow_types=True, hoist_loop_bounds=True, fast_io=False,
+                 profile=False, profile_cycles=False, source_name=None, elide_bounds_checks=True,
+                 fork_server=False):
+        self.narrow_types = narrow_types
+        # Array accesses proven in range (by range analysis, or by the range of
+        # an enclosing FOR loop) are emitted without rt_index
+        self.elide_bounds_checks = elide_bounds_checks
+        self.bounds_checked = False
+        self.fast_io = fast_io
+        # The program runs as basic_main under a server main that forks it
+        # once per request (see c_runtime.FORK_SERVER and runner_pool.py)
+        self.fork_server = fork_server
+        # Instrumentation: per-line counters (and timers) plus #line directives
+        # pointing gcc, gdb and perf at source_name
+        self.profile = profile or profile_cycles
+        self.profile_cycles = profile_cycles
+        self.source_name = source_name
+        self.profile_slots = {}
+        self.hoist_loop_bounds = hoist_loop_bounds
+        self.loop_temp_count = 0
         self.output = []
         self.variables = set()
+        self.arrays = {}
+        self.var_ranges = {}
+        self.analyzer = None
         self.return_stack_used = False
         self.used_labels = set()
         self.goto_targets = set()
-        self.return_targets = set()
+        self.return_sites = 0
+        self.next_return_site = 0
         self.label_required = set()
+        # Source line of the statement being generated, and the one gcc
+        # assigns to the next output line (None before the first #line)
+        self.source_line = None
+        self.mapped_line = None
 
     def emit(self, line):
-        self.output.append("    " + line)
+        self.write("    " + line)
+
+    def write(self, text):
+        """Appends a line of generated code, first re-syncing gcc's line mapping
+        with a #line directive when it no longer points at the current statement."""
+        if self.source_name and self.source_line is not None and self.mapped_line != self.source_line:
+            self.output.append(f'#line {self.source_line} "{self.source_name}"')
+            self.mapped_line = self.source_line
+        self.output.append(text)
+        if self.mapped_line is not None:
+            self.mapped_line += 1
+
+    def enter_statement(self, stmt):
+        """Makes stmt's source line the current one; returns the previous one to restore."""
+        saved = self.source_line
+        if stmt.source_line is not None:
+            self.source_line = stmt.source_line
+        return saved
 
     def visit(self, node):
         method_name = 'visit_' + type(node).__name__
@@ -24,52 +72,123 @@ class CodeGenerator:
         raise Exception(f"No visit_{type(node).__name__} method")
 
     def visit_Program(self, node):
-        # Collect all jump targets first
-        for labeled in node.statements:
-            stmt = labeled.statement
-            if isinstance(stmt, GotoStatement):
-                self.goto_targets.add(stmt.target)
-            elif isinstance(stmt, GosubStatement):
+        # Collect all jump targets first, including those nested in IF and FOR
+        self.goto_targets = jump_targets(node.statements)
+        for stmt in walk_statements(node.statements):
+            if isinstance(stmt, GosubStatement):
                 self.return_stack_used = True
-                self.goto_targets.add(stmt.target)
-                self.return_targets.add(labeled.number + 10)
+                self.return_sites += 1
             elif isinstance(stmt, ReturnStatement):
                 self.return_stack_used = True
 
-        self.label_required = self.goto_targets.union(self.return_targets)
+        self.label_required = set(self.goto_targets)
+        self.analyze(node)
 
         # Start generating code
         self.output = ["#include <stdio.h>", ""]
+        if self.fast_io:
+            self.output.extend(FAST_IO.strip("\n").split("\n"))
+            self.output.append("")
         if self.return_stack_used:
             self.output.append("int return_stack[100];")
             self.output.append("int sp = -1;")
 
+        if self.profile:
+            profiled_lines = sorted({stmt.line for stmt in walk_statements(node.statements)
+                                     if stmt.line is not None})
+            self.profile_slots = {line: i for i, line in enumerate(profiled_lines)}
+            runtime = profile_runtime(profiled_lines, self.profile_cycles)
+            self.output.extend(runtime.strip("\n").split("\n"))
+            self.output.append("")
+
         self.output.append("int main() {")
+        if self.fast_io:
+            self.emit("atexit(rt_flush);")
+        if self.profile:
+            self.emit("atexit(prof_dump);")
 
         # Generate statements
-        for labeled in node.statements:
-            number = labeled.number
-            stmt = labeled.statement
-            if number in self.label_required:
-                self.output.append(f"label_{number}:")
-            self.visit(stmt)
+        self.emit_lines(node.statements)
 
         if self.variables:
-            decl_line = f"int {', '.join(sorted(self.variables))};"
             insert_index = self.output.index("int main() {") + 1
-            self.output.insert(insert_index, decl_line)
+            self.output[insert_index:insert_index] = self.declarations()
+        if self.arrays:
+            # Arrays are static storage, zeroed and outside main's stack frame
+            insert_index = self.output.index("int main() {")
+            globals_ = []
+            if self.bounds_checked:
+                globals_.extend(BOUNDS_CHECK.strip("\n").split("\n"))
+                globals_.append("")
+            for name in sorted(self.arrays):
+                ctype = self.var_type(name + '()')
+                globals_.append(f"static {ctype} arr_{name}[{self.arrays[name] + 1}];")
+            globals_.append("")
+            self.output[insert_index:insert_index] = globals_
 
         self.emit("return 0;")
         self.output.append("}")
+        if self.fork_server:
+            self.output[self.output.index("int main() {")] = "static int basic_main(void) {"
+            self.output.extend(FORK_SERVER.rstrip("\n").split("\n"))
         return "\n".join(self.output)
 
+    def analyze(self, node):
+        """Collects DIM sizes and runs the range analysis the generated types rely on."""
+        for stmt in walk_statements(node.statements):
+            if isinstance(stmt, DimStatement):
+                for name, size in stmt.arrays.items():
+                    self.arrays[name] = max(size, self.arrays.get(name, 0))
+
+        if self.narrow_types or self.elide_bounds_checks:
+            self.analyzer = RangeAnalyzer()
+            self.var_ranges = self.analyzer.analyze(node)
+
+    def mark_line(self, stmt, previous_line):
+        """Emits the profile counter for the first statement of a BASIC line."""
+        if stmt.line is None or stmt.line == previous_line:
+            return
+        if self.profile:
+            self.emit(f"PROF_LINE({self.profile_slots[stmt.line]});")
+
+    def var_type(self, name):
+        if not self.narrow_types:
+            return 'int'
+        return choose_type(self.var_ranges.get(name))
+
+    def declarations(self, initialize=True):
+        """Scalar declarations; BASIC variables start at 0, which the range analysis relies on."""
+        by_type = {}
+        for var in sorted(self.variables):
+            by_type.setdefault(self.var_type(var), []).append(f"{var} = 0" if initialize else var)
+        return [f"{ctype} {', '.join(by_type[ctype])};"
+                for ctype, _, _ in C_TYPES if ctype in by_type]
+
+    def is_wide(self, expr):
+        """True if the expression needs 64-bit arithmetic in C."""
+        if not self.narrow_types:
+            return False
+        if isinstance(expr, (Variable, ArrayRef)):
+            return self.var_type(target_name(expr)) == 'long long'
+        if isinstance(expr, BinaryOp):
+            if expr.op in COMPARISON_OPS:
+                return False
+            r = self.analyzer.expr_range(expr)
+            if r is not None and not fits(r, INT_MIN, INT_MAX):
+                return True
+            return self.is_wide(expr.left) or self.is_wide(expr.right)
+        if isinstance(expr, Number):
+            return not INT_MIN <= expr.value <= INT_MAX
+        return False
+
     def visit_LetStatement(self, node):
-        var = node.variable.name
-        self.variables.add(var)
+        var = self.visit(node.variable)
         expr = self.visit(node.expr)
         self.emit(f"{var} = {expr};")
 
     def visit_Number(self, node):
+        if not INT_MIN <= node.value <= INT_MAX:
+            return f"{node.value}LL"
         return str(node.value)
 
     def visit_String(self, node):
@@ -79,28 +198,88 @@ class CodeGenerator:
         self.variables.add(node.name)
         return node.name
 
+    def visit_ArrayRef(self, node):
+        size = self.arrays.setdefault(node.name, DEFAULT_ARRAY_SIZE)
+        index = self.visit(node.index)
+        if self.elide_bounds_checks and fits(self.analyzer.expr_range(node.index), 0, size):
+            return f"arr_{node.name}[{index}]"
+        self.bounds_checked = True
+        return f'arr_{node.name}[rt_index({index}, {size}, "{node.name}")]'
+
+    def visit_DimStatement(self, node):
+        # Storage is declared before main (see visit_Program)
+        pass
+
     def visit_BinaryOp(self, node):
         left = self.visit(node.left)
         right = self.visit(node.right)
-        op_map = {
-            'PLUS': '+', 'MINUS': '-', 'MUL': '*', 'DIV': '/',
-            'EQ': '==', 'NEQ': '!=', 'LT': '<', 'LE': '<=',
-            'GT': '>', 'GE': '>='
-        }
-        op = op_map.get(node.op, node.op)
+        op = C_OPERATORS.get(node.op, node.op)
+        if self.narrow_types:
+            # Promote before the operation if the result can leave int range
+            r = self.analyzer.expr_range(node)
+            if r is not None and not fits(r, INT_MIN, INT_MAX):
+                left = f"(long long){left}"
         return f"({left} {op} {right})"
 
     def visit_PrintStatement(self, node):
         expr = self.visit(node.expr)
-        if isinstance(node.expr, String):
+        if self.fast_io:
+            if isinstance(node.expr, String):
+                self.emit(f'rt_print_str({expr}, sizeof({expr}) - 1);')
+            else:
+                self.emit(f'rt_print_int({expr});')
+        elif isinstance(node.expr, String):
             self.emit(f'printf({expr});')
+        elif self.is_wide(node.expr):
+            self.emit(f'printf("%lld\\n", (long long){expr});')
         else:
             self.emit(f'printf("%d\\n", {expr});')
 
     def visit_InputStatement(self, node):
-        var = node.variable.name
-        self.variables.add(var)
-        self.emit(f'scanf("%d", &{var});')
+        var = self.visit(node.variable)
+        if self.fast_io:
+            self.emit(f'if (rt_read_int()) {var} = rt_in;')
+        elif self.var_type(target_name(node.variable)) == 'long long':
+            self.emit(f'scanf("%lld", &{var});')
+        else:
+            self.emit(f'scanf("%d", &{var});')
+
+    def emit_lines(self, statements):
+        """Emits a list of LabeledStatements, with each needed label once per line number."""
+        previous_line = None
+        for labeled in statements:
+            number = labeled.number
+            stmt = labeled.statement
+            outer_line = self.enter_statement(stmt)
+            # Optimization passes may emit several statements under one line number
+            if number in self.label_required and number not in self.used_labels:
+                self.used_labels.add(number)
+                self.write(f"label_{number}:")
+            self.mark_line(stmt, previous_line)
+            previous_line = stmt.line
+            self.visit(stmt)
+            self.source_line = outer_line
+
+    def visit_BlockStatement(self, node):
+        self.emit_lines(node.statements)
+
+    def visit_WhileStatement(self, node):
+        cond = self.visit(node.condition)
+        self.emit(f"while ({cond}) {{")
+        self.emit_lines(node.body)
+        self.emit("}")
+
+    def visit_DoWhileStatement(self, node):
+        self.emit("do {")
+        self.emit_lines(node.body)
+        cond = self.visit(node.condition)
+        self.emit(f"}} while ({cond});")
+
+    def visit_BreakStatement(self, node):
+        self.emit("break;")
+
+    def visit_ContinueStatement(self, node):
+        self.emit("continue;")
 
     def visit_IfStatement(self, node):
         cond = self.visit(node.condition)
@@ -118,10 +297,83 @@ class CodeGenerator:
         start = self.visit(node.start)
         end = self.visit(node.end)
         step = self.visit(node.step)
-        self.emit(f"for ({var} = {start}; {var} <= {end}; {var} += {step}) {{")
+
+        # Bounds the body cannot change are evaluated once, before the loop
+        hoisted = []
+        if self.hoist_loop_bounds and self.is_loop_invariant(node):
+            if constant_value(node.end) is None:
+                end = self.loop_temp("for_end", node.end, end, hoisted)
+            if constant_value(node.step) is None:
+                step = self.loop_temp("for_step", node.step, step, hoisted)
+        if hoisted:
+            self.emit("{")
+            for line in hoisted:
+                self.emit(line)
+
+        step_value = constant_value(node.step)
+        if step_value is None:
+            cond = f"({step} < 0 ? {var} >= {end} : {var} <= {end})"
+        elif step_value < 0:
+            cond = f"{var} >= {end}"
+        else:
+            cond = f"{var} <= {end}"
+        self.emit(f"for ({var} = {start}; {cond}; {var} += {step}) {{")
+        # Inside the body the variable stays between start and end
+        body_range = self.body_range(node)
+        saved = self.analyzer.local_ranges.get(var, EMPTY) if self.analyzer else EMPTY
+        if body_range is not None:
+            self.analyzer.local_ranges[var] = body_range
+        previous_line = None
         for stmt in node.body:
+            outer_line = self.enter_statement(stmt)
+            self.mark_line(stmt, previous_line)
+            previous_line = stmt.line
             self.visit(stmt)
+            self.source_line = outer_line
+        if body_range is not None:
+            if saved is EMPTY:
+                del self.analyzer.local_ranges[var]
+            else:
+                self.analyzer.local_ranges[var] = saved
         self.emit("}")
+        if hoisted:
+            self.emit("}")
+
+    def is_loop_invariant(self, node):
+        """True if the loop body cannot change the variables used in the end and step expressions."""
+        assigned, opaque = assigned_variables(node.body)
+        if opaque:
+            return False
+        assigned.add(node.var.name)
+        used = expr_variables(node.end) | expr_variables(node.step)
+        return not (used & assigned)
+
+    def body_range(self, node):
+        """Range of the loop variable while the body runs, or None if unknown."""
+        if self.analyzer is None:
+            return None
+        assigned, opaque = assigned_variables(node.body)
+        if opaque or node.var.name in assigned:
+            return None
+        start = self.analyzer.expr_range(node.start)
+        end = self.analyzer.expr_range(node.end)
+        step = self.analyzer.expr_range(node.step)
+        if not (start and end and step):
+            return None
+        if step[0] > 0:
+            lo, hi = start[0], end[1]
+        elif step[1] < 0:
+            lo, hi = end[0], start[1]
+        else:
+            return None
+        return (lo, hi) if lo <= hi else None
+
+    def loop_temp(self, prefix, expr, code, hoisted):
+        self.loop_temp_count += 1
+        name = f"{prefix}{self.loop_temp_count}"
+        ctype = 'long long' if self.is_wide(expr) else 'int'
+        hoisted.append(f"{ctype} {name} = {code};")
+        return name
 
     def visit_NextStatement(self, node):
         pass  
@@ -130,13 +382,17 @@ class CodeGenerator:
         self.emit(f"goto label_{node.target};")
 
     def visit_GosubStatement(self, node):
-        self.emit(f"return_stack[++sp] = {node.target + 10};")
+        # Each GOSUB gets its own return point just after the jump
+        site = self.next_return_site
+        self.next_return_site += 1
+        self.emit(f"return_stack[++sp] = {site};")
         self.emit(f"goto label_{node.target};")
+        self.write(f"return_{site}: ;")
 
     def visit_ReturnStatement(self, node):
         self.emit("switch (return_stack[sp--]) {")
-        for label in sorted(self.return_targets):
-            self.emit(f"  case {label}: goto label_{label};")
+        for site in range(self.return_sites):
+            self.emit(f"  case {site}: goto return_{site};")
         self.emit("}")
 
     def visit_RemStatement(self, node):
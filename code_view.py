@@ -0,0 +1,225 @@
+# code_view.py
+# Widgets that keep the GUI responsive on very large programs.
+#
+# CodeView shows read-only text as a plain list of lines and paints only the
+# ones in the viewport, so setting 100k lines of generated C costs a split()
+# instead of a full QTextDocument layout. LogView batches terminal appends
+# and flushes them on a short timer instead of relaying out per chunk.
+
+from PyQt5.QtWidgets import QAbstractScrollArea, QApplication, QPlainTextEdit
+from PyQt5.QtGui import QKeySequence, QPainter, QTextCursor
+from PyQt5.QtCore import QEvent, Qt, QTimer
+
+# Milliseconds between terminal flushes; a 60 Hz frame is ~16 ms
+FLUSH_INTERVAL = 30
+# Lines the terminal keeps before dropping the oldest
+MAX_LOG_LINES = 20000
+
+
+class CodeView(QAbstractScrollArea):
+    """Read-only, monospaced view of a large text that paints only visible lines.
+
+    Supports the QTextEdit calls the GUI uses (setPlainText, toPlainText,
+    clear, setPlaceholderText), line selection with the mouse or Shift+arrows,
+    Ctrl+A and Ctrl+C. Replacing the text keeps the scroll position, so a
+    re-conversion stays where the user was reading.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.lines = []
+        self.text = ""
+        self.longest = 0
+        self.placeholder = ""
+        self.anchor = None  # Selected lines are anchor..cursor, inclusive
+        self.cursor = None
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.update_metrics()
+
+    # --- QTextEdit-like API ---
+
+    def setPlainText(self, text):
+        self.text = text
+        self.lines = text.split("\n")
+        self.longest = max(map(len, self.lines)) if text else 0
+        self.anchor = self.cursor = None
+        self.update_scrollbars()
+        self.viewport().update()
+
+    def toPlainText(self):
+        return self.text
+
+    def clear(self):
+        self.setPlainText("")
+
+    def setPlaceholderText(self, text):
+        self.placeholder = text
+        self.viewport().update()
+
+    # --- Layout ---
+
+    def update_metrics(self):
+        metrics = self.fontMetrics()
+        self.line_height = metrics.lineSpacing()
+        self.ascent = metrics.ascent()
+        self.char_width = max(1, metrics.horizontalAdvance("M"))
+        self.margin = self.char_width // 2
+
+    def visible_lines(self):
+        return max(1, self.viewport().height() // self.line_height)
+
+    def update_scrollbars(self):
+        page = self.visible_lines()
+        vbar = self.verticalScrollBar()
+        vbar.setRange(0, max(0, len(self.lines) - page))
+        vbar.setPageStep(page)
+        vbar.setSingleStep(1)
+        width = self.viewport().width()
+        hbar = self.horizontalScrollBar()
+        hbar.setRange(0, max(0, self.longest * self.char_width + 2 * self.margin - width))
+        hbar.setPageStep(width)
+        hbar.setSingleStep(self.char_width)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbars()
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.FontChange:
+            self.update_metrics()
+            self.update_scrollbars()
+        super().changeEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.setFont(self.font())
+        palette = self.palette()
+        if not self.text:
+            painter.setPen(palette.placeholderText().color())
+            painter.drawText(self.margin, self.margin + self.ascent, self.placeholder)
+            return
+        first = self.verticalScrollBar().value() + event.rect().top() // self.line_height
+        last = min(len(self.lines), self.verticalScrollBar().value()
+                   + event.rect().bottom() // self.line_height + 1)
+        x = self.margin - self.horizontalScrollBar().value()
+        top = self.verticalScrollBar().value()
+        selected = self.selection()
+        for i in range(first, last):
+            y = (i - top) * self.line_height
+            if selected and selected[0] <= i <= selected[1]:
+                painter.fillRect(0, y, self.viewport().width(), self.line_height, palette.highlight())
+                painter.setPen(palette.highlightedText().color())
+            else:
+                painter.setPen(palette.text().color())
+            painter.drawText(x, y + self.ascent, self.lines[i])
+
+    # --- Selection and keyboard ---
+
+    def selection(self):
+        if self.anchor is None:
+            return None
+        return min(self.anchor, self.cursor), max(self.anchor, self.cursor)
+
+    def line_at(self, y):
+        line = self.verticalScrollBar().value() + y // self.line_height
+        return max(0, min(len(self.lines) - 1, line))
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton and self.text:
+            self.cursor = self.line_at(event.pos().y())
+            if not (event.modifiers() & Qt.ShiftModifier) or self.anchor is None:
+                self.anchor = self.cursor
+            self.viewport().update()
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton and self.anchor is not None:
+            y = event.pos().y()
+            if y < 0:
+                self.verticalScrollBar().setValue(self.verticalScrollBar().value() - 1)
+            elif y > self.viewport().height():
+                self.verticalScrollBar().setValue(self.verticalScrollBar().value() + 1)
+            self.cursor = self.line_at(y)
+            self.viewport().update()
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.SelectAll) and self.text:
+            self.anchor, self.cursor = 0, len(self.lines) - 1
+            self.viewport().update()
+        elif event.matches(QKeySequence.Copy):
+            selected = self.selection()
+            if selected:
+                QApplication.clipboard().setText("\n".join(self.lines[selected[0]:selected[1] + 1]))
+        elif event.key() in (Qt.Key_Up, Qt.Key_Down) and event.modifiers() & Qt.ShiftModifier and self.text:
+            if self.anchor is None:
+                self.anchor = self.cursor = self.verticalScrollBar().value()
+            step = -1 if event.key() == Qt.Key_Up else 1
+            self.cursor = max(0, min(len(self.lines) - 1, self.cursor + step))
+            self.ensure_visible(self.cursor)
+            self.viewport().update()
+        elif event.key() == Qt.Key_Home and event.modifiers() & Qt.ControlModifier:
+            self.verticalScrollBar().setValue(0)
+        elif event.key() == Qt.Key_End and event.modifiers() & Qt.ControlModifier:
+            self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+        else:
+            # Arrows and Page Up/Down scroll through the scroll bars
+            super().keyPressEvent(event)
+
+    def ensure_visible(self, line):
+        vbar = self.verticalScrollBar()
+        if line < vbar.value():
+            vbar.setValue(line)
+        elif line >= vbar.value() + self.visible_lines():
+            vbar.setValue(line - self.visible_lines() + 1)
+
+
+class LogView(QPlainTextEdit):
+    """Read-only terminal pane whose appends are buffered and flushed on a timer.
+
+    append_text() only queues the text; every FLUSH_INTERVAL ms the queue is
+    inserted in one edit. The view follows the end only when it was already
+    scrolled to the bottom, and keeps at most MAX_LOG_LINES lines.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(MAX_LOG_LINES)
+        self.pending = []
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(FLUSH_INTERVAL)
+        self.flush_timer.timeout.connect(self.flush)
+        # The scroll range grows after the layout catches up, so follow the
+        # end from rangeChanged rather than right after inserting
+        self.following = True
+        scrollbar = self.verticalScrollBar()
+        scrollbar.rangeChanged.connect(self.keep_following)
+        scrollbar.valueChanged.connect(self.update_following)
+
+    def append_text(self, text):
+        self.pending.append(text)
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def flush(self):
+        if not self.pending:
+            return
+        text = "".join(self.pending)
+        self.pending = []
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+
+    def keep_following(self, minimum, maximum):
+        if self.following:
+            self.verticalScrollBar().setValue(maximum)
+
+    def update_following(self, value):
+        self.following = value >= self.verticalScrollBar().maximum()
+
+    def clear(self):
+        self.pending = []
+        self.flush_timer.stop()
+        super().clear()
@@ -0,0 +1,37 @@
+# diagnostics.py
+
+class Diagnostic:
+    """A single compiler message tied to a source position (1-based line and column)."""
+
+    def __init__(self, message, line, column, severity='error'):
+        self.message = message
+        self.line = line
+        self.column = column
+        self.severity = severity
+
+    def to_dict(self):
+        return {
+            'line': self.line,
+            'column': self.column,
+            'severity': self.severity,
+            'message': self.message,
+        }
+
+    def __repr__(self):
+        return f"{self.line}:{self.column}: {self.severity}: {self.message}"
+
+
+class BasicSyntaxError(SyntaxError):
+    """SyntaxError raised by the lexer and parser, carrying the source position."""
+
+    def __init__(self, message, line, column):
+        super().__init__(message)
+        self.message = message
+        self.lineno = line
+        self.offset = column
+
+    def __str__(self):
+        return f"{self.message} (line {self.lineno}, column {self.offset})"
+
+    def to_diagnostic(self):
+        return Diagnostic(self.message, self.lineno, self.offset)
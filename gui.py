@@ -6,9 +6,11 @@ from PyQt5.QtWidgets import (
     QApplication, QWidget, QTextEdit, QVBoxLayout, QPushButton,
     QLabel, QHBoxLayout, QMessageBox, QSplitter, QSizePolicy
 )
-from PyQt5.QtGui import QFont, QTextCursor
+from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt, QProcess, QTimer
 
+from code_view import CodeView, LogView
+
 # Assuming main.py is in the same directory and contains compile_basic_to_c
 try:
     from main import compile_basic_to_c
@@ -58,13 +60,13 @@ class CompilerGUI(QWidget):
                 text-transform: uppercase; /* Uppercase for a modern feel */
                 font-size: 24px; /* Larger font size for the heading */
             }
-            QTextEdit {
+            QTextEdit, QPlainTextEdit, CodeView {
                 border: 1px solid #ccc; /* Lighter gray border */
                 border-radius: 10px; /* More rounded corners for text editors */
                 padding: 10px; /* Increased padding inside text editors */
                 background-color: #ffffff; /* White background for editors */
             }
-            QTextEdit:focus { /* Style when a text editor is focused */
+            QTextEdit:focus, QPlainTextEdit:focus, CodeView:focus { /* Style when a text editor is focused */
                 border: 1px solid #4a90e2; /* Blue border on focus */
             }
             QPushButton {
@@ -118,18 +120,15 @@ class CompilerGUI(QWidget):
         self.basic_input.setPlaceholderText("Enter your BASIC code here...")
         self.basic_input.setLineWrapMode(QTextEdit.NoWrap)  # Disable word wrap for code readability
 
-        # C Output Editor (Read-only)
-        self.c_output = QTextEdit()
+        # C Output (Read-only); paints only the visible lines, so 100k-line programs display instantly
+        self.c_output = CodeView()
         self.c_output.setFont(editor_font)
-        self.c_output.setReadOnly(True)  # C output is not editable by the user
         self.c_output.setPlaceholderText("C code output will appear here...")
-        self.c_output.setLineWrapMode(QTextEdit.NoWrap)  # Disable word wrap for code readability
 
-        # Terminal Output (for Compilation messages only in this version)
-        self.terminal_output = QTextEdit()
+        # Terminal Output (for Compilation messages only in this version); appends are batched on a timer
+        self.terminal_output = LogView()
         self.terminal_output.setFont(editor_font)
         self.terminal_output.setPlaceholderText("Compilation messages (GCC output) will appear here. Program I/O will open in a separate window.")
-        self.terminal_output.setReadOnly(True)  # Make this read-only as user input goes to external terminal now
         self.terminal_output.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
         # Convert Button
@@ -196,12 +195,8 @@ class CompilerGUI(QWidget):
             return False
 
     def append_to_terminal(self, text):
-        """Appends text to the terminal output area and ensures the cursor is at the end."""
-        cursor = self.terminal_output.textCursor()
-        cursor.movePosition(QTextCursor.End)
-        cursor.insertText(text)
-        self.terminal_output.setTextCursor(cursor)
-        self.terminal_output.ensureCursorVisible()
+        """Queues text for the terminal output area; it is shown on the next flush."""
+        self.terminal_output.append_text(text)
 
     def convert_code(self):
         """Converts BASIC code to C code and displays it."""
@@ -210,7 +205,7 @@ class CompilerGUI(QWidget):
             QMessageBox.warning(self, "Input Error", "Please enter BASIC code to convert.")
             return
 
-        self.c_output.clear()  # Clear previous C output
+        # The previous C output stays (and keeps its scroll position) until replaced
         self.terminal_output.clear()  # Clear terminal
         self.append_to_terminal("Attempting to convert BASIC to C...\n")
 
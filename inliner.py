@@ -0,0 +1,200 @@
+# inliner.py
+
+import copy
+
+from astt import *
+from ast_utils import jump_targets, walk_statements
+
+# Subroutines with at most this many statements are inlined at every call site;
+# larger ones only when they have a single caller
+INLINE_LIMIT = 8
+
+# Statements after which the next line can only be reached by a jump
+TERMINATORS = (GotoStatement, ReturnStatement, EndStatement)
+
+
+class Inliner:
+    """Removes GOSUB/RETURN and GOTO overhead before code generation.
+
+    - Jump chains are threaded: GOTO, IF ... THEN GOTO and GOSUB to a line
+      that only jumps on (past REM lines) go straight to the final target,
+      and a GOTO to the line that follows it is dropped.
+    - A subroutine is a run of top-level lines from a GOSUB target up to the
+      first RETURN. When it contains no other GOTO, GOSUB or RETURN it is
+      copied in place of each GOSUB to it, if it is small or called once.
+      Inlining leaves turns their callers into leaves, so this repeats until
+      nothing changes.
+    - An inlined subroutine that is no longer targeted by any jump and
+      cannot be reached by falling through is removed.
+
+    Counts are kept in `threaded`, `inlined` and `removed`.
+    """
+
+    def __init__(self, limit=INLINE_LIMIT):
+        self.limit = limit
+        self.threaded = 0
+        self.inlined = 0
+        self.removed = 0
+
+    def run(self, program):
+        program.statements = self.thread_jumps(program.statements)
+        candidates = {}
+        while True:
+            self.subroutines = self.inlinable(program.statements)
+            if not self.subroutines:
+                break
+            candidates.update(self.subroutines)
+            program.statements = self.expand_lines(program.statements)
+        program.statements = self.remove_dead(program.statements, candidates)
+        return program
+
+    # --- Jump threading ---
+
+    def thread_jumps(self, items):
+        first_index = {}
+        for i, item in enumerate(items):
+            first_index.setdefault(item.number, i)
+
+        def resolve(target):
+            seen = set()
+            while target not in seen and target in first_index:
+                seen.add(target)
+                i = first_index[target]
+                while i < len(items) and isinstance(items[i].statement, RemStatement):
+                    i += 1
+                if i == len(items) or not isinstance(items[i].statement, GotoStatement):
+                    break
+                target = items[i].statement.target
+            return target
+
+        for stmt in walk_statements(items):
+            if isinstance(stmt, (GotoStatement, GosubStatement)):
+                target = resolve(stmt.target)
+                if target != stmt.target:
+                    stmt.target = target
+                    self.threaded += 1
+
+        # A GOTO to the line that follows anyway does nothing; going backwards
+        # lets a run of them collapse
+        targets = jump_targets(items)
+        kept = []
+        for item in reversed(items):
+            if (isinstance(item.statement, GotoStatement) and kept
+                    and item.statement.target == kept[-1].number
+                    and item.number not in targets):
+                self.threaded += 1
+                continue
+            kept.append(item)
+        kept.reverse()
+        return kept
+
+    # --- Inlining ---
+
+    def inlinable(self, items):
+        """Returns {target: (start, end)} for the leaf subroutines worth inlining,
+        where items[start:end] is the body and items[end] its RETURN."""
+        calls = {}
+        for stmt in walk_statements(items):
+            if isinstance(stmt, GosubStatement):
+                calls[stmt.target] = calls.get(stmt.target, 0) + 1
+
+        first_index = {}
+        for i, item in enumerate(items):
+            first_index.setdefault(item.number, i)
+
+        subroutines = {}
+        for target, count in calls.items():
+            start = first_index.get(target)
+            if start is None:
+                continue
+            end = start
+            while end < len(items) and not isinstance(items[end].statement, ReturnStatement):
+                end += 1
+            if end == len(items):
+                continue
+            body = [stmt for stmt in walk_statements(items[start:end])
+                    if not isinstance(stmt, RemStatement)]
+            if any(isinstance(stmt, (GotoStatement, GosubStatement, ReturnStatement)) for stmt in body):
+                continue
+            if count == 1 or len(body) <= self.limit:
+                subroutines[target] = (start, end)
+        self.body_items = items
+        return subroutines
+
+    def body_copy(self, target):
+        """Fresh copies of a subroutine's statements, so later passes may rewrite each one."""
+        start, end = self.subroutines[target]
+        self.inlined += 1
+        return [copy.deepcopy(item.statement) for item in self.body_items[start:end]
+                if not isinstance(item.statement, RemStatement)]
+
+    def is_inlined_call(self, stmt):
+        return isinstance(stmt, GosubStatement) and stmt.target in self.subroutines
+
+    def expand_lines(self, items):
+        """Expands calls in a list of LabeledStatements; copies take the caller's line number."""
+        out = []
+        for item in items:
+            if self.is_inlined_call(item.statement):
+                out.extend(LabeledStatement(item.number, stmt) for stmt in self.body_copy(item.statement.target))
+            else:
+                item.statement = self.expand(item.statement, item.number)
+                out.append(item)
+        return out
+
+    def expand_body(self, statements, number):
+        """Expands calls in a FOR body, whose statements carry no line labels."""
+        out = []
+        for stmt in statements:
+            if self.is_inlined_call(stmt):
+                out.extend(self.body_copy(stmt.target))
+            else:
+                out.append(self.expand(stmt, number))
+        return out
+
+    def expand(self, stmt, number):
+        if self.is_inlined_call(stmt):
+            # A single statement slot, such as an IF branch
+            block = BlockStatement([LabeledStatement(number, s) for s in self.body_copy(stmt.target)])
+            block.line, block.source_line = stmt.line, stmt.source_line
+            return block
+        if isinstance(stmt, IfStatement):
+            stmt.then_branch = self.expand(stmt.then_branch, number)
+            if stmt.else_branch:
+                stmt.else_branch = self.expand(stmt.else_branch, number)
+        elif isinstance(stmt, ForStatement):
+            stmt.body = self.expand_body(stmt.body, number)
+        elif isinstance(stmt, BlockStatement):
+            stmt.statements = self.expand_lines(stmt.statements)
+        return stmt
+
+    # --- Dead subroutine removal ---
+
+    def remove_dead(self, items, candidates):
+        targets = jump_targets(items)
+        first_index = {}
+        for i, item in enumerate(items):
+            first_index.setdefault(item.number, i)
+        starts = {}
+        for target in candidates:
+            start = first_index.get(target)
+            if start is None:
+                continue
+            end = start
+            while end < len(items) and not isinstance(items[end].statement, ReturnStatement):
+                end += 1
+            if end < len(items):
+                starts[start] = end
+
+        out = []
+        i = 0
+        while i < len(items):
+            end = starts.get(i)
+            if (end is not None and out and isinstance(out[-1].statement, TERMINATORS)
+                    and not any(item.number in targets for item in items[i:end + 1])):
+                self.removed += 1
+                i = end + 1
+                continue
+            out.append(items[i])
+            i += 1
+        return out
@@ -0,0 +1,523 @@
+# ir.py
+# Flat three-address intermediate representation between the AST and C.
+#
+# An IRProgram is four parallel arrays: opcodes, destinations and two operands.
+# Operands are ints (constants) or strings (BASIC variables, CSE temporaries and
+# IR temporaries t0, t1, ...). Jump targets are label strings: 'label_<n>' for
+# BASIC line n and 'ir_<k>' for labels made during lowering. Passes over the IR
+# are plain index loops over these arrays.
+#
+# Usage: python ir.py FILE.bas   (interprets the program using stdin/stdout)
+
+import sys
+from array import array
+
+from astt import *
+from ast_utils import DEFAULT_ARRAY_SIZE, c_div, constant_value, walk_statements
+from c_runtime import BOUNDS_CHECK, FAST_IO, FORK_SERVER
+
+# Opcodes
+COPY, ADD, SUB, MUL, DIV, EQ, NE, LT, LE, GT, GE = range(11)
+JUMP, JUMP_IF_NOT, PRINT, PRINT_STR, INPUT, GOSUB, RETURN, END, NOP = range(11, 20)
+# LOAD dst, array, index and STORE array, index, value
+LOAD, STORE = range(20, 22)
+
+OPCODE_NAMES = [
+    'COPY', 'ADD', 'SUB', 'MUL', 'DIV', 'EQ', 'NE', 'LT', 'LE', 'GT', 'GE',
+    'JUMP', 'JUMP_IF_NOT', 'PRINT', 'PRINT_STR', 'INPUT', 'GOSUB', 'RETURN', 'END', 'NOP',
+    'LOAD', 'STORE',
+]
+
+BINARY_OPCODES = {
+    '+': ADD, '-': SUB, '*': MUL, '/': DIV,
+    '=': EQ, '<>': NE, '<': LT, '<=': LE, '>': GT, '>=': GE,
+}
+
+C_BINARY = {
+    ADD: '+', SUB: '-', MUL: '*', DIV: '/',
+    EQ: '==', NE: '!=', LT: '<', LE: '<=', GT: '>', GE: '>=',
+}
+
+# Opcodes that end a basic block
+TERMINATORS = (JUMP, JUMP_IF_NOT, GOSUB, RETURN, END)
+
+
+def line_label(number):
+    return f"label_{number}"
+
+
+class IRProgram:
+    def __init__(self):
+        self.ops = array('B')
+        self.dst = []
+        self.a = []
+        self.b = []
+        self.labels = {}    # label -> index of the instruction it names
+        self.strings = []   # PRINT_STR operands index into this pool
+        self.variables = set()
+        self.arrays = {}    # array name -> size (valid indexes 0..size)
+
+    def __len__(self):
+        return len(self.ops)
+
+    def add(self, op, dst=None, a=None, b=None):
+        self.ops.append(op)
+        self.dst.append(dst)
+        self.a.append(a)
+        self.b.append(b)
+
+    def mark(self, label):
+        self.labels[label] = len(self.ops)
+
+    def names(self):
+        """Returns every variable and temporary the instructions read or write."""
+        names = set(self.variables)
+        for i, op in enumerate(self.ops):
+            if op <= GE:
+                operands = (self.dst[i], self.a[i], self.b[i])
+            elif op in (PRINT, JUMP_IF_NOT):
+                operands = (self.a[i],)
+            elif op == INPUT:
+                operands = (self.dst[i],)
+            elif op == LOAD:
+                operands = (self.dst[i], self.b[i])
+            elif op == STORE:
+                operands = (self.a[i], self.b[i])
+            else:
+                continue
+            names.update(x for x in operands if type(x) is str)
+        return names
+
+    def jump_targets(self):
+        targets = set()
+        for i, op in enumerate(self.ops):
+            if op in (JUMP, GOSUB):
+                targets.add(self.a[i])
+            elif op == JUMP_IF_NOT:
+                targets.add(self.b[i])
+            if op == GOSUB:
+                targets.add(self.b[i])
+        return targets
+
+    def basic_blocks(self):
+        """Returns {label: (start, end)} for every basic block, keyed by the label at its start.
+
+        Blocks start at jump targets and after terminators; unlabeled
+        leaders (e.g. code after a GOTO) are keyed by their index.
+        """
+        by_index = {}
+        for label, index in self.labels.items():
+            by_index.setdefault(index, label)
+        leaders = {0} | {self.labels[t] for t in self.jump_targets()}
+        for i, op in enumerate(self.ops):
+            if op in TERMINATORS:
+                leaders.add(i + 1)
+        leaders = sorted(i for i in leaders if i < len(self.ops))
+        blocks = {}
+        for k, start in enumerate(leaders):
+            end = leaders[k + 1] if k + 1 < len(leaders) else len(self.ops)
+            blocks[by_index.get(start, start)] = (start, end)
+        return blocks
+
+    def __repr__(self):
+        by_index = {}
+        for label, index in self.labels.items():
+            by_index.setdefault(index, []).append(label)
+        lines = []
+        for i, op in enumerate(self.ops):
+            for label in by_index.get(i, []):
+                lines.append(f"{label}:")
+            operands = [repr(x) for x in (self.dst[i], self.a[i], self.b[i]) if x is not None]
+            lines.append(f"    {OPCODE_NAMES[op]} {', '.join(operands)}")
+        return "\n".join(lines)
+
+
+class IRBuilder:
+    """Lowers an astt.Program into an IRProgram."""
+
+    def __init__(self):
+        self.ir = IRProgram()
+        self.temp_count = 0
+        self.label_count = 0
+        self.loops = []     # (continue label, break label) of the enclosing structured loops
+
+    def new_temp(self):
+        name = f"t{self.temp_count}"
+        self.temp_count += 1
+        return name
+
+    def new_label(self):
+        label = f"ir_{self.label_count}"
+        self.label_count += 1
+        return label
+
+    def lower(self, program):
+        for stmt in walk_statements(program.statements):
+            if isinstance(stmt, DimStatement):
+                for name, size in stmt.arrays.items():
+                    self.ir.arrays[name] = max(size, self.ir.arrays.get(name, 0))
+        self.lower_lines(program.statements)
+        self.ir.add(END)
+        return self.ir
+
+    def lower_lines(self, statements):
+        for labeled in statements:
+            # A line label names the first instruction of its line, even when
+            # passes put several statements under one number
+            label = line_label(labeled.number)
+            if label not in self.ir.labels:
+                self.ir.mark(label)
+            self.visit(labeled.statement)
+
+    def visit(self, node):
+        method_name = 'visit_' + type(node).__name__
+        visitor = getattr(self, method_name, self.generic_visit)
+        return visitor(node)
+
+    def generic_visit(self, node):
+        raise Exception(f"No visit_{type(node).__name__} method")
+
+    def operand(self, expr, dst=None):
+        """Emits code computing expr and returns the operand holding its value."""
+        if isinstance(expr, Number):
+            return expr.value
+        if isinstance(expr, Variable):
+            self.ir.variables.add(expr.name)
+            return expr.name
+        if isinstance(expr, BinaryOp):
+            left = self.operand(expr.left)
+            right = self.operand(expr.right)
+            dst = dst or self.new_temp()
+            self.ir.add(BINARY_OPCODES[expr.op], dst, left, right)
+            return dst
+        if isinstance(expr, ArrayRef):
+            index = self.operand(expr.index)
+            dst = dst or self.new_temp()
+            self.ir.add(LOAD, dst, self.array(expr.name), index)
+            return dst
+        raise Exception(f"Cannot lower expression {expr}")
+
+    def array(self, name):
+        self.ir.arrays.setdefault(name, DEFAULT_ARRAY_SIZE)
+        return name
+
+    def assign(self, name, expr):
+        self.ir.variables.add(name)
+        if isinstance(expr, (BinaryOp, ArrayRef)):
+            self.operand(expr, name)
+        else:
+            self.ir.add(COPY, name, self.operand(expr))
+
+    def visit_LetStatement(self, node):
+        if isinstance(node.variable, ArrayRef):
+            index = self.operand(node.variable.index)
+            value = self.operand(node.expr)
+            self.ir.add(STORE, self.array(node.variable.name), index, value)
+        else:
+            self.assign(node.variable.name, node.expr)
+
+    def visit_PrintStatement(self, node):
+        if isinstance(node.expr, String):
+            self.ir.strings.append(node.expr.value)
+            self.ir.add(PRINT_STR, None, len(self.ir.strings) - 1)
+        else:
+            self.ir.add(PRINT, None, self.operand(node.expr))
+
+    def visit_InputStatement(self, node):
+        if isinstance(node.variable, ArrayRef):
+            # Read into a temporary holding the old element, kept if the read fails
+            index = self.operand(node.variable.index)
+            value = self.new_temp()
+            self.ir.add(LOAD, value, self.array(node.variable.name), index)
+            self.ir.add(INPUT, value)
+            self.ir.add(STORE, self.array(node.variable.name), index, value)
+        else:
+            self.ir.variables.add(node.variable.name)
+            self.ir.add(INPUT, node.variable.name)
+
+    def visit_DimStatement(self, node):
+        # Sizes are collected up front in lower()
+        pass
+
+    def visit_IfStatement(self, node):
+        else_label = self.new_label()
+        cond = self.operand(node.condition)
+        self.ir.add(JUMP_IF_NOT, None, cond, else_label)
+        self.visit(node.then_branch)
+        if node.else_branch:
+            end_label = self.new_label()
+            self.ir.add(JUMP, None, end_label)
+            self.ir.mark(else_label)
+            self.visit(node.else_branch)
+            self.ir.mark(end_label)
+        else:
+            self.ir.mark(else_label)
+
+    def visit_ForStatement(self, node):
+        var = node.var.name
+        head, exit_label = self.new_label(), self.new_label()
+        self.assign(var, node.start)
+        self.ir.mark(head)
+        # Like the C loop, the bounds are re-evaluated on every iteration
+        end = self.operand(node.end)
+        step = self.operand(node.step)
+        cond = self.new_temp()
+        step_value = constant_value(node.step)
+        if step_value is None:
+            up, check = self.new_label(), self.new_label()
+            negative = self.new_temp()
+            self.ir.add(LT, negative, step, 0)
+            self.ir.add(JUMP_IF_NOT, None, negative, up)
+            self.ir.add(GE, cond, var, end)
+            self.ir.add(JUMP, None, check)
+            self.ir.mark(up)
+            self.ir.add(LE, cond, var, end)
+            self.ir.mark(check)
+        else:
+            self.ir.add(GE if step_value < 0 else LE, cond, var, end)
+        self.ir.add(JUMP_IF_NOT, None, cond, exit_label)
+        for stmt in node.body:
+            self.visit(stmt)
+        self.ir.add(ADD, var, var, step)
+        self.ir.add(JUMP, None, head)
+        self.ir.mark(exit_label)
+
+    def visit_BlockStatement(self, node):
+        self.lower_lines(node.statements)
+
+    def visit_WhileStatement(self, node):
+        head, exit_label = self.new_label(), self.new_label()
+        self.ir.mark(head)
+        self.ir.add(JUMP_IF_NOT, None, self.operand(node.condition), exit_label)
+        self.loops.append((head, exit_label))
+        self.lower_lines(node.body)
+        self.loops.pop()
+        self.ir.add(JUMP, None, head)
+        self.ir.mark(exit_label)
+
+    def visit_DoWhileStatement(self, node):
+        head, check, exit_label = self.new_label(), self.new_label(), self.new_label()
+        self.ir.mark(head)
+        self.loops.append((check, exit_label))
+        self.lower_lines(node.body)
+        self.loops.pop()
+        self.ir.mark(check)
+        cond = self.operand(node.condition)
+        self.ir.add(JUMP_IF_NOT, None, cond, exit_label)
+        self.ir.add(JUMP, None, head)
+        self.ir.mark(exit_label)
+
+    def visit_BreakStatement(self, node):
+        self.ir.add(JUMP, None, self.loops[-1][1])
+
+    def visit_ContinueStatement(self, node):
+        self.ir.add(JUMP, None, self.loops[-1][0])
+
+    def visit_NextStatement(self, node):
+        pass
+
+    def visit_GotoStatement(self, node):
+        self.ir.add(JUMP, None, line_label(node.target))
+
+    def visit_GosubStatement(self, node):
+        return_label = self.new_label()
+        self.ir.add(GOSUB, None, line_label(node.target), return_label)
+        self.ir.mark(return_label)
+
+    def visit_ReturnStatement(self, node):
+        self.ir.add(RETURN)
+
+    def visit_EndStatement(self, node):
+        self.ir.add(END)
+
+    def visit_RemStatement(self, node):
+        self.ir.add(NOP, None, node.comment)
+
+
+def lower(program):
+    return IRBuilder().lower(program)
+
+
+class IRInterpreter:
+    """Executes an IRProgram directly, reading integers from stdin like scanf("%d")."""
+
+    def __init__(self, ir, stdin=None, stdout=None):
+        self.ir = ir
+        self.stdin = stdin or sys.stdin
+        self.stdout = stdout or sys.stdout
+        self.env = {}
+        self.pending_input = []
+
+    def read_int(self):
+        while not self.pending_input:
+            line = self.stdin.readline()
+            if not line:
+                return None
+            self.pending_input = line.split()[::-1]
+        try:
+            return int(self.pending_input.pop())
+        except ValueError:
+            return None
+
+    def run(self):
+        ir, env = self.ir, self.env
+        ops, dst, a, b, labels = ir.ops, ir.dst, ir.a, ir.b, ir.labels
+        write = self.stdout.write
+        return_stack = []
+        pc, n = 0, len(ops)
+        arrays = {name: [0] * (size + 1) for name, size in ir.arrays.items()}
+
+        def value(x):
+            return x if type(x) is int else env.get(x, 0)
+
+        def checked(name, index):
+            if not 0 <= index < len(arrays[name]):
+                raise IndexError(f"Index {index} out of range for {name}(0 to {len(arrays[name]) - 1})")
+            return index
+
+        while pc < n:
+            op = ops[pc]
+            if op <= GE:
+                if op == COPY:
+                    env[dst[pc]] = value(a[pc])
+                else:
+                    x, y = value(a[pc]), value(b[pc])
+                    if op == ADD:
+                        r = x + y
+                    elif op == SUB:
+                        r = x - y
+                    elif op == MUL:
+                        r = x * y
+                    elif op == DIV:
+                        if y == 0:
+                            raise ZeroDivisionError("Division by zero")
+                        r = c_div(x, y)
+                    elif op == EQ:
+                        r = int(x == y)
+                    elif op == NE:
+                        r = int(x != y)
+                    elif op == LT:
+                        r = int(x < y)
+                    elif op == LE:
+                        r = int(x <= y)
+                    elif op == GT:
+                        r = int(x > y)
+                    else:
+                        r = int(x >= y)
+                    env[dst[pc]] = r
+            elif op == JUMP:
+                pc = labels[a[pc]]
+                continue
+            elif op == JUMP_IF_NOT:
+                if not value(a[pc]):
+                    pc = labels[b[pc]]
+                    continue
+            elif op == PRINT:
+                write(f"{value(a[pc])}\n")
+            elif op == PRINT_STR:
+                write(ir.strings[a[pc]])
+            elif op == INPUT:
+                number = self.read_int()
+                if number is not None:
+                    env[dst[pc]] = number
+            elif op == GOSUB:
+                return_stack.append(b[pc])
+                pc = labels[a[pc]]
+                continue
+            elif op == RETURN:
+                pc = labels[return_stack.pop()]
+                continue
+            elif op == LOAD:
+                env[dst[pc]] = arrays[a[pc]][checked(a[pc], value(b[pc]))]
+            elif op == STORE:
+                arrays[dst[pc]][checked(dst[pc], value(a[pc]))] = value(b[pc])
+            elif op == END:
+                break
+            pc += 1
+        return env
+
+
+def emit_c(ir, fast_io=False, fork_server=False):
+    """Generates C from an IRProgram. All values are held in long long.
+    With fork_server the program becomes basic_main under c_runtime.FORK_SERVER."""
+    targets = ir.jump_targets()
+    label_at = {}
+    for label, index in ir.labels.items():
+        if label in targets:
+            label_at.setdefault(index, []).append(label)
+    return_sites = [b for op, b in zip(ir.ops, ir.b) if op == GOSUB]
+    site_numbers = {site: k for k, site in enumerate(return_sites)}
+    names = sorted(ir.names())
+
+    def c(x):
+        return f"{x}LL" if type(x) is int and abs(x) > 2**31 - 1 else str(x)
+
+    out = ["#include <stdio.h>", ""]
+    if fast_io:
+        out.extend(FAST_IO.strip("\n").split("\n"))
+        out.append("")
+    # RETURN reads the stack even when the inliner has removed every GOSUB
+    if return_sites or RETURN in ir.ops:
+        out.append("int return_stack[100];")
+        out.append("int sp = -1;")
+    if ir.arrays:
+        out.extend(BOUNDS_CHECK.strip("\n").split("\n"))
+        out.append("")
+        for name in sorted(ir.arrays):
+            out.append(f"static long long arr_{name}[{ir.arrays[name] + 1}];")
+    out.append("static int basic_main(void) {" if fork_server else "int main() {")
+    if names:
+        # BASIC variables start at 0, as in IRInterpreter
+        out.append(f"long long {', '.join(name + ' = 0' for name in names)};")
+    if fast_io:
+        out.append("    atexit(rt_flush);")
+
+    for i, op in enumerate(ir.ops):
+        for label in label_at.get(i, []):
+            out.append(f"{label}: ;")
+        d, x, y = ir.dst[i], ir.a[i], ir.b[i]
+        if op == COPY:
+            line = f"{d} = {c(x)};"
+        elif op in C_BINARY:
+            line = f"{d} = {c(x)} {C_BINARY[op]} {c(y)};"
+        elif op == JUMP:
+            line = f"goto {x};"
+        elif op == JUMP_IF_NOT:
+            line = f"if (!{c(x)}) goto {y};"
+        elif op == PRINT:
+            line = f"rt_print_int({c(x)});" if fast_io else f'printf("%lld\\n", (long long){c(x)});'
+        elif op == PRINT_STR:
+            s = f'"{ir.strings[x]}"'
+            line = f"rt_print_str({s}, sizeof({s}) - 1);" if fast_io else f"printf({s});"
+        elif op == INPUT:
+            line = f"if (rt_read_int()) {d} = rt_in;" if fast_io else f'scanf("%lld", &{d});'
+        elif op == GOSUB:
+            line = f"return_stack[++sp] = {site_numbers[y]}; goto {x};"
+        elif op == RETURN:
+            cases = " ".join(f"case {k}: goto {site};" for k, site in enumerate(return_sites))
+            line = f"switch (return_stack[sp--]) {{ {cases} }}"
+        elif op == LOAD:
+            line = f'{d} = arr_{x}[rt_index({c(y)}, {ir.arrays[x]}, "{x}")];'
+        elif op == STORE:
+            line = f'arr_{d}[rt_index({c(x)}, {ir.arrays[d]}, "{d}")] = {c(y)};'
+        elif op == END:
+            line = "return 0;"
+        else:
+            line = f"// {x}" if x else ";"
+        out.append("    " + line)
+    for label in label_at.get(len(ir.ops), []):
+        out.append(f"{label}: ;")
+    out.append("    return 0;")
+    out.append("}")
+    if fork_server:
+        out.extend(FORK_SERVER.rstrip("\n").split("\n"))
+    return "\n".join(out)
+
+
+if __name__ == "__main__":
+    from lexer import Lexer
+    from parser import Parser
+
+    with open(sys.argv[1], 'r') as f:
+        program = Parser(Lexer(f.read()).tokenize()).parse()
+    IRInterpreter(lower(program)).run()
@@ -2,114 +2,120 @@
 
 import re
 from tokens import TOKEN_TYPES
+from diagnostics import BasicSyntaxError
+
+PATTERNS = [
+    # Order matters: multi-char operators first
+    ('NEQ',       r'<>'),
+    ('LE',        r'<='),
+    ('GE',        r'>='),
+
+    # Literals
+    ('NUMBER',    r'\d+'),
+    ('STRING',    r'"[^"]*"'),
+
+    # Keywords
+    ('LET',       r'LET'),
+    ('PRINT',     r'PRINT'),
+    ('INPUT',     r'INPUT'),
+    ('IF',        r'IF'),
+    ('THEN',      r'THEN'),
+    ('ELSE',      r'ELSE'),
+    ('FOR',       r'FOR'),
+    ('TO',        r'TO'),
+    ('STEP',      r'STEP'),
+    ('NEXT',      r'NEXT'),
+    ('GOTO',      r'GOTO'),
+    ('GOSUB',     r'GOSUB'),
+    ('RETURN',    r'RETURN'),
+    ('REM',       r'REM.*'),  # Must go before IDENTIFIER
+    ('END',       r'END'),
+    ('DIM',       r'DIM'),
+
+    # Identifiers
+    ('IDENTIFIER', r'[A-Z][A-Z0-9]*'),
+
+    # Operators
+    ('EQ',        r'='),
+    ('PLUS',      r'\+'),
+    ('MINUS',     r'-'),
+    ('MUL',       r'\*'),
+    ('DIV',       r'/'),
+    ('GT',        r'>'),
+    ('LT',        r'<'),
+
+    # Symbols
+    ('LPAREN',    r'\('),
+    ('RPAREN',    r'\)'),
+    ('COLON',     r':'),
+    ('COMMA',     r','),
+
+    # Other
+    ('NEWLINE',   r'\n'),
+    ('SKIP',      r'[ \t\r]+'),
+    ('MISMATCH',  r'.'),  # Must be last
+]
+
+# One compiled alternation; the first pattern that matches wins, as above
+MASTER_PATTERN = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in PATTERNS))
+
 
 class Token:
-    def __init__(self, type_, value):
+    def __init__(self, type_, value, line=None, column=None):
         self.type = type_
         self.value = value
+        self.line = line
+        self.column = column
 
     def __repr__(self):
         return f"Token({self.type}, {repr(self.value)})"
 
 class Lexer:
-    def __init__(self, source_code):
+    def __init__(self, source_code, diagnostics=None):
         self.source = source_code
         self.tokens = []
         self.position = 0
         self.length = len(source_code)
+        # When a list is given, errors are collected into it instead of raised
+        self.diagnostics = diagnostics
 
     def tokenize(self):
-        patterns = [
-            # Order matters: multi-char operators first
-            ('NEQ',       r'<>'),
-            ('LE',        r'<='),
-            ('GE',        r'>='),
-
-            # Literals
-            ('NUMBER',    r'\d+'),
-            ('STRING',    r'"[^"]*"'),
-
-            # Keywords
-            ('LET',       r'LET'),
-            ('PRINT',     r'PRINT'),
-            ('INPUT',     r'INPUT'),
-            ('IF',        r'IF'),
-            ('THEN',      r'THEN'),
-            ('ELSE',      r'ELSE'),
-            ('FOR',       r'FOR'),
-            ('TO',        r'TO'),
-            ('STEP',      r'STEP'),
-            ('NEXT',      r'NEXT'),
-            ('GOTO',      r'GOTO'),
-            ('GOSUB',     r'GOSUB'),
-            ('RETURN',    r'RETURN'),
-            ('REM',       r'REM.*'),  # Must go before IDENTIFIER
-            ('END',       r'END'),
-
-            # Identifiers
-            ('IDENTIFIER', r'[A-Z][A-Z0-9]*'),
-
-            # Operators
-            ('EQ',        r'='),
-            ('PLUS',      r'\+'),
-            ('MINUS',     r'-'),
-            ('MUL',       r'\*'),
-            ('DIV',       r'/'),
-            ('GT',        r'>'),
-            ('LT',        r'<'),
-
-            # Symbols
-            ('LPAREN',    r'\('),
-            ('RPAREN',    r'\)'),
-            ('COLON',     r':'),
-            ('COMMA',     r','),
-
-            # Other
-            ('NEWLINE',   r'\n'),
-            ('SKIP',      r'[ \t]+'),
-            ('MISMATCH',  r'.'),  # Must be last
-        ]
-
         pos = 0
+        line = 1
+        line_start = 0
         while pos < self.length:
-            match = None
-            for token_type, pattern in patterns:
-                regex = re.compile(pattern)
-                match = regex.match(self.source, pos)
-                if match:
-                    value = match.group(0)
-
-                    # Skip spaces/tabs
-                    if token_type == 'SKIP':
-                        pos = match.end()
-                        break
-
-                    # Skip comments (REM)
-                    if token_type == 'REM':
-                        self.tokens.append(Token(TOKEN_TYPES[token_type], value.strip()))
-                        newline_pos = self.source.find('\n', pos)
-                        if newline_pos == -1:
-                            pos = self.length
-                        else:
-                            pos = newline_pos + 1
-                        break
-
-                    # Handle string literals
-                    if token_type == 'STRING':
-                        value = value[1:-1]  # remove quotes
-
-                    if token_type in TOKEN_TYPES:
-                        self.tokens.append(Token(TOKEN_TYPES[token_type], value))
-                    else:
-                        raise ValueError(f"Unknown token type '{token_type}'")
-
-                    pos = match.end()
-                    break
-
-            if not match:
-                raise SyntaxError(f"Unexpected character '{self.source[pos]}' at position {pos}")
-        
-        self.tokens.append(Token(TOKEN_TYPES['EOF'], None))
+            match = MASTER_PATTERN.match(self.source, pos)
+            token_type = match.lastgroup
+            value = match.group(0)
+            column = pos - line_start + 1
+            pos = match.end()
+
+            # Skip spaces/tabs
+            if token_type == 'SKIP':
+                continue
+
+            if token_type == 'MISMATCH':
+                error = BasicSyntaxError(f"Unexpected character '{value}'", line, column)
+                if self.diagnostics is None:
+                    raise error
+                self.diagnostics.append(error.to_diagnostic())
+                continue
+
+            # Comments (REM) run to the end of the line
+            if token_type == 'REM':
+                value = value.strip()
+
+            # Handle string literals
+            elif token_type == 'STRING':
+                value = value[1:-1]  # remove quotes
+
+            self.tokens.append(Token(TOKEN_TYPES[token_type], value, line, column))
+
+            if token_type == 'NEWLINE':
+                line += 1
+                line_start = pos
+
+        self.tokens.append(Token(TOKEN_TYPES['EOF'], None, line, pos - line_start + 1))
         return self.tokens
 
 # ✅ Test Run
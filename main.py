@@ -1,39 +1,112 @@
 from lexer import Lexer
 from parser import Parser
 from code_generator import CodeGenerator
+from shard_generator import DEFAULT_SHARDS, ShardedCodeGenerator
+from inliner import Inliner
+from unroller import LoopUnroller
+from value_numbering import ValueNumbering
+from structurer import Structurer
+from ast_cache import load_or_parse
+from node_factory import InterningFactory
+import ir
 
+# CodeGenerator options the IR emitter implements; asking for any other
+# (profiling, #line mapping, narrow types, elided checks) is an error there
+IR_OPTIONS = ('fast_io', 'fork_server')
 
-def compile_basic_to_c(basic_code):
+
+def compile_basic_to_c(basic_code, intern=False, **options):
     # Step 1: Lexical Analysis
     lexer = Lexer(basic_code)
     tokens = lexer.tokenize()
 
-    # Step 2: Parsing to AST
-    parser = Parser(tokens)
+    # Step 2: Parsing to AST; intern=True shares identical expression subtrees
+    parser = Parser(tokens, factory=InterningFactory() if intern else None)
     ast = parser.parse()
 
-    # Step 3: Code Generation
-    generator = CodeGenerator()
+    return compile_ast_to_c(ast, **options)
+
+
+def compile_ast_to_c(ast, inline=True, unroll=True, cse=True, structure=True, stats=None, backend='ast',
+                     **options):
+    if backend == 'ir':
+        unsupported = sorted(name for name, value in options.items() if value and name not in IR_OPTIONS)
+        if unsupported:
+            raise ValueError(f"Not supported by the IR backend: {', '.join(unsupported)}")
+
+    # Step 3: Optimization
+    ast = optimize(ast, inline, unroll, cse, structure, stats)
+
+    # Step 4: Code Generation, either straight from the AST or through the linear IR
+    if backend == 'ir':
+        return ir.emit_c(ir.lower(ast), fast_io=options.get('fast_io', False),
+                         fork_server=options.get('fork_server', False))
+    generator = CodeGenerator(**options)
     c_code = generator.visit(ast)
 
     return c_code
 
 
+def compile_basic_to_shards(basic_code, shards=DEFAULT_SHARDS, inline=True, unroll=True, cse=True,
+                            structure=True, stats=None, intern=False, **options):
+    """Like compile_basic_to_c, but returns {file name: contents} for a sharded
+    build: subroutines as functions spread over `shards` C files, plus a Makefile."""
+    factory = InterningFactory() if intern else None
+    ast = Parser(Lexer(basic_code).tokenize(), factory=factory).parse()
+    ast = optimize(ast, inline, unroll, cse, structure, stats)
+    generator = ShardedCodeGenerator(shards, **options)
+    files = generator.generate(ast)
+    if stats is not None:
+        stats['subroutine_functions'] = len(generator.subroutines)
+    return files
+
+
+def optimize(ast, inline=True, unroll=True, cse=True, structure=True, stats=None):
+    if inline:
+        inliner = Inliner()
+        ast = inliner.run(ast)
+        if stats is not None:
+            stats['jumps_threaded'] = inliner.threaded
+            stats['calls_inlined'] = inliner.inlined
+            stats['subroutines_removed'] = inliner.removed
+    if unroll:
+        unroller = LoopUnroller()
+        ast = unroller.run(ast)
+        if stats is not None:
+            stats['loops_unrolled'] = unroller.unrolled
+            stats['loops_partially_unrolled'] = unroller.partially_unrolled
+    if cse:
+        numbering = ValueNumbering()
+        ast = numbering.run(ast)
+        if stats is not None:
+            stats['cse_eliminated'] = numbering.eliminated
+    if structure:
+        structurer = Structurer()
+        ast = structurer.run(ast)
+        if stats is not None:
+            stats['loops_structured'] = structurer.loops
+            stats['branches_structured'] = structurer.branches
+    return ast
+
+
 def main():
     print("--- BASIC to C Compiler ---")
     input_file = input("Enter the BASIC file path: ").strip()
 
     try:
-        with open(input_file, 'r') as f:
-            basic_code = f.read()
+        # Reuses FILE.bas.astc when the source has not changed
+        ast = load_or_parse(input_file)
 
-        c_code = compile_basic_to_c(basic_code)
+        stats = {}
+        c_code = compile_ast_to_c(ast, stats=stats)
 
         output_file = input_file.rsplit('.', 1)[0] + ".c"
         with open(output_file, 'w') as f:
             f.write(c_code)
 
         print(f"\nC code generated and saved to: {output_file}")
+        if stats.get('cse_eliminated'):
+            print(f"Common subexpressions eliminated: {stats['cse_eliminated']} operations")
 
     except FileNotFoundError:
         print("Error: File not found.")
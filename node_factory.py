@@ -0,0 +1,80 @@
+# node_factory.py
+# How the parser builds expression nodes.
+#
+# NodeFactory allocates a fresh node for every occurrence, as the parser has
+# always done. InterningFactory hash-conses them instead: structurally equal
+# Number, String, Variable, ArrayRef and BinaryOp nodes are one shared object,
+# and identifier names go through sys.intern. Children are interned before
+# their parent, so a parent's key holds its children by identity and two
+# interned subtrees are equal exactly when they are the same object (`is`).
+#
+# A shared node may sit at many places in the tree, so passes must never
+# modify an expression node in place; they build new ones (see
+# unroller.substitute), and statements are never shared.
+
+import sys
+
+from astt import ArrayRef, BinaryOp, Number, String, Variable
+
+
+class NodeFactory:
+    """Allocates a new node per call."""
+
+    def name(self, name):
+        return name
+
+    def number(self, value):
+        return Number(value)
+
+    def string(self, value):
+        return String(value)
+
+    def variable(self, name):
+        return Variable(name)
+
+    def array_ref(self, name, index):
+        return ArrayRef(name, index)
+
+    def binary_op(self, left, op, right):
+        return BinaryOp(left, op, right)
+
+
+class InterningFactory(NodeFactory):
+    """Returns the existing node for a structure seen before.
+
+    `nodes` maps each structure key to its node; `hits` counts the calls
+    answered from it. One factory can be shared by several parses.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.hits = 0
+
+    def lookup(self, key, node_class, *args):
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = node_class(*args)
+        else:
+            self.hits += 1
+        return node
+
+    def name(self, name):
+        return sys.intern(name)
+
+    def number(self, value):
+        return self.lookup((Number, value), Number, value)
+
+    def string(self, value):
+        return self.lookup((String, value), String, value)
+
+    def variable(self, name):
+        name = sys.intern(name)
+        return self.lookup((Variable, name), Variable, name)
+
+    def array_ref(self, name, index):
+        name = sys.intern(name)
+        # Nodes hash by identity, so keying on the interned children is O(1)
+        return self.lookup((ArrayRef, name, index), ArrayRef, name, index)
+
+    def binary_op(self, left, op, right):
+        return self.lookup((BinaryOp, left, op, right), BinaryOp, left, op, right)
@@ -2,24 +2,48 @@
 
 from tokens import TOKEN_TYPES
 from astt import *
+from diagnostics import BasicSyntaxError
+from ast_utils import constant_value
+from node_factory import NodeFactory
 from lexer import Lexer  # Only for test case at bottom
 
 class Parser:
-    def __init__(self, tokens):
+    def __init__(self, tokens, diagnostics=None, factory=None):
         self.tokens = tokens
         self.pos = 0
         self.current_token = self.tokens[self.pos]
+        # When a list is given, errors are collected into it and parsing
+        # resumes at the next line instead of stopping
+        self.diagnostics = diagnostics
+        # Builds the expression nodes; an InterningFactory shares equal subtrees
+        self.factory = factory or NodeFactory()
 
     def advance(self):
         self.pos += 1
         if self.pos < len(self.tokens):
             self.current_token = self.tokens[self.pos]
 
+    def error(self, message, token=None):
+        token = token or self.current_token
+        return BasicSyntaxError(message, token.line, token.column)
+
     def expect(self, token_type):
         if self.current_token.type != token_type:
-            raise SyntaxError(f"Expected {token_type}, got {self.current_token}")
+            raise self.error(f"Expected {token_type}, got {self.current_token}")
         self.advance()
-    
+
+    def expect_end_of_line(self):
+        if self.current_token.type not in (TOKEN_TYPES['NEWLINE'], TOKEN_TYPES['EOF']):
+            raise self.error(f"Expected end of line, got {self.current_token}")
+
+    def recover(self, error):
+        """Records an error and skips to the start of the next line."""
+        if self.diagnostics is None:
+            raise error
+        self.diagnostics.append(error.to_diagnostic())
+        while self.current_token.type not in (TOKEN_TYPES['NEWLINE'], TOKEN_TYPES['EOF']):
+            self.advance()
+
     def skip_newlines(self):
         while self.current_token.type == TOKEN_TYPES['NEWLINE']:
             self.advance()
@@ -30,13 +54,20 @@ class Parser:
             self.skip_newlines()  
             if self.current_token.type == TOKEN_TYPES['EOF']:
                 break
-            if self.current_token.type == TOKEN_TYPES['NUMBER']:
-                line_number = int(self.current_token.value)
-                self.advance()
-                stmt = self.parse_statement()
-                statements.append(LabeledStatement(line_number, stmt))
-            else:
-                raise SyntaxError(f"Expected line number, got: {self.current_token}")
+            try:
+                if self.current_token.type == TOKEN_TYPES['NUMBER']:
+                    line_number = int(self.current_token.value)
+                    source_line = self.current_token.line
+                    self.advance()
+                    stmt = self.parse_statement()
+                    stmt.line = line_number
+                    stmt.source_line = source_line
+                    self.expect_end_of_line()
+                    statements.append(LabeledStatement(line_number, stmt))
+                else:
+                    raise self.error(f"Expected line number, got: {self.current_token}")
+            except BasicSyntaxError as e:
+                self.recover(e)
         return Program(statements)
 
     def parse_statement(self):
@@ -67,13 +98,28 @@ class Parser:
         elif token.type == TOKEN_TYPES['END']:
             self.advance()
             return EndStatement()
+        elif token.type == TOKEN_TYPES['DIM']:
+            return self.parse_dim()
         else:
-            raise SyntaxError(f"Unknown statement starting with: {token}")
+            raise self.error(f"Unknown statement starting with: {token}")
+
+    def parse_target(self):
+        """Parses what LET and INPUT assign: a variable or an array element A(I)."""
+        name = self.current_token.value
+        self.expect(TOKEN_TYPES['IDENTIFIER'])
+        if self.current_token.type == TOKEN_TYPES['LPAREN']:
+            return self.factory.array_ref(name, self.parse_index())
+        return self.factory.variable(name)
+
+    def parse_index(self):
+        self.expect(TOKEN_TYPES['LPAREN'])
+        index = self.parse_expression()
+        self.expect(TOKEN_TYPES['RPAREN'])
+        return index
 
     def parse_let(self):
         self.expect(TOKEN_TYPES['LET'])
-        var = Variable(self.current_token.value)
-        self.expect(TOKEN_TYPES['IDENTIFIER'])
+        var = self.parse_target()
         self.expect(TOKEN_TYPES['EQ'])
         expr = self.parse_expression()
         return LetStatement(var, expr)
@@ -81,7 +127,7 @@ class Parser:
     def parse_print(self):
         self.expect(TOKEN_TYPES['PRINT'])
         if self.current_token.type == TOKEN_TYPES['STRING']:
-            string = String(self.current_token.value)
+            string = self.factory.string(self.current_token.value)
             self.advance()
             return PrintStatement(string)
         else:
@@ -90,10 +136,25 @@ class Parser:
 
     def parse_input(self):
         self.expect(TOKEN_TYPES['INPUT'])
-        var = Variable(self.current_token.value)
-        self.expect(TOKEN_TYPES['IDENTIFIER'])
+        var = self.parse_target()
         return InputStatement(var)
 
+    def parse_dim(self):
+        self.expect(TOKEN_TYPES['DIM'])
+        arrays = {}
+        while True:
+            name = self.factory.name(self.current_token.value)
+            self.expect(TOKEN_TYPES['IDENTIFIER'])
+            token = self.current_token
+            size = constant_value(self.parse_index())
+            # Arrays are static C storage, so the size must be known when compiling
+            if size is None or size < 0:
+                raise self.error("DIM size must be a non-negative constant", token)
+            arrays[name] = size
+            if self.current_token.type != TOKEN_TYPES['COMMA']:
+                return DimStatement(arrays)
+            self.advance()
+
     def parse_if(self):
         self.expect(TOKEN_TYPES['IF'])
         condition = self.parse_expression()
@@ -107,13 +168,13 @@ class Parser:
 
     def parse_for(self):
         self.expect(TOKEN_TYPES['FOR'])
-        var = Variable(self.current_token.value)
+        var = self.factory.variable(self.current_token.value)
         self.expect(TOKEN_TYPES['IDENTIFIER'])
         self.expect(TOKEN_TYPES['EQ'])
         start = self.parse_expression()
         self.expect(TOKEN_TYPES['TO'])
         end = self.parse_expression()
-        step = Number(1)
+        step = self.factory.number(1)
         if self.current_token.type == TOKEN_TYPES['STEP']:
             self.advance()
             step = self.parse_expression()
@@ -122,38 +183,51 @@ class Parser:
         while True:
             self.skip_newlines()
             if self.current_token.type == TOKEN_TYPES['EOF']:
-                raise SyntaxError("Unexpected end of input inside FOR loop")
+                error = self.error("Unexpected end of input inside FOR loop")
+                if self.diagnostics is None:
+                    raise error
+                self.diagnostics.append(error.to_diagnostic())
+                break
 
-            if self.current_token.type == TOKEN_TYPES['NUMBER']:
-                line_number = int(self.current_token.value)
-                self.advance()
-                stmt = self.parse_statement()
+            try:
+                if self.current_token.type == TOKEN_TYPES['NUMBER']:
+                    line_number = int(self.current_token.value)
+                    source_line = self.current_token.line
+                    self.advance()
+                    stmt = self.parse_statement()
+                    stmt.line = line_number
+                    stmt.source_line = source_line
+                    self.expect_end_of_line()
 
-                if isinstance(stmt, NextStatement) and stmt.var.name == var.name:
-                    break
+                    if isinstance(stmt, NextStatement) and stmt.var.name == var.name:
+                        break
+                    else:
+                        body.append(stmt)
                 else:
-                    body.append(stmt)
-            else:
-                raise SyntaxError("Expected line number inside FOR loop")
+                    raise self.error("Expected line number inside FOR loop")
+            except BasicSyntaxError as e:
+                self.recover(e)
 
         return ForStatement(var, start, end, step, body)
 
     def parse_next(self):
         self.expect(TOKEN_TYPES['NEXT'])
-        var = Variable(self.current_token.value)
+        var = self.factory.variable(self.current_token.value)
         self.expect(TOKEN_TYPES['IDENTIFIER'])
         return NextStatement(var)
 
     def parse_goto(self):
         self.expect(TOKEN_TYPES['GOTO'])
-        line = int(self.current_token.value)
+        token = self.current_token
         self.expect(TOKEN_TYPES['NUMBER'])
+        line = int(token.value)
         return GotoStatement(line)
 
     def parse_gosub(self):
         self.expect(TOKEN_TYPES['GOSUB'])
-        line = int(self.current_token.value)
+        token = self.current_token
         self.expect(TOKEN_TYPES['NUMBER'])
+        line = int(token.value)
         return GosubStatement(line)
 
     def parse_expression(self):
@@ -167,7 +241,7 @@ class Parser:
             op = self.current_token.type
             self.advance()
             right = self.parse_term()
-            left = BinaryOp(left, op, right)
+            left = self.factory.binary_op(left, op, right)
         return left
 
     def parse_term(self):
@@ -176,7 +250,7 @@ class Parser:
             op = self.current_token.type
             self.advance()
             right = self.parse_factor()
-            left = BinaryOp(left, op, right)
+            left = self.factory.binary_op(left, op, right)
         return left
 
     def parse_factor(self):
@@ -185,27 +259,33 @@ class Parser:
             op = self.current_token.type
             self.advance()
             right = self.parse_atom()
-            left = BinaryOp(left, op, right)
+            left = self.factory.binary_op(left, op, right)
         return left
 
     def parse_atom(self):
         token = self.current_token
         if token.type == TOKEN_TYPES['NUMBER']:
             self.advance()
-            return Number(int(token.value))
+            return self.factory.number(int(token.value))
         elif token.type == TOKEN_TYPES['STRING']:
             self.advance()
-            return String(token.value)
+            return self.factory.string(token.value)
         elif token.type == TOKEN_TYPES['IDENTIFIER']:
             self.advance()
-            return Variable(token.value)
+            if self.current_token.type == TOKEN_TYPES['LPAREN']:
+                return self.factory.array_ref(token.value, self.parse_index())
+            return self.factory.variable(token.value)
+        elif token.type == TOKEN_TYPES['MINUS']:
+            # Unary minus, e.g. STEP -1
+            self.advance()
+            return self.factory.binary_op(self.factory.number(0), TOKEN_TYPES['MINUS'], self.parse_atom())
         elif token.type == TOKEN_TYPES['LPAREN']:
             self.advance()
             expr = self.parse_expression()
             self.expect(TOKEN_TYPES['RPAREN'])
             return expr
         else:
-            raise SyntaxError(f"Unexpected token: {token}")
+            raise self.error(f"Unexpected token: {token}")
 
 # ✅ TEST CASE
 # if __name__ == "__main__":
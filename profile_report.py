@@ -0,0 +1,69 @@
+# profile_report.py
+# Ranks BASIC lines by the profile written by programs compiled with
+# CodeGenerator(profile=True) or CodeGenerator(profile_cycles=True).
+#
+# Usage: python profile_report.py [PROFILE] [--source FILE.bas] [--top N]
+
+import argparse
+import re
+
+
+def read_profile(path):
+    """Returns a list of (line, count, cycles) rows."""
+    rows = []
+    with open(path, 'r') as f:
+        for text in f:
+            if text.startswith('#') or not text.strip():
+                continue
+            line, count, cycles = (int(x) for x in text.split())
+            rows.append((line, count, cycles))
+    return rows
+
+
+def read_source_lines(path):
+    """Maps BASIC line numbers to the text written after them."""
+    lines = {}
+    with open(path, 'r') as f:
+        for text in f:
+            match = re.match(r'\s*(\d+)\s+(.*)', text)
+            if match:
+                lines[int(match.group(1))] = match.group(2).rstrip()
+    return lines
+
+
+def rank(rows, top=20):
+    """Sorts lines hottest first: by cycles when the profile has timings, else by count."""
+    timed = any(cycles for _, _, cycles in rows)
+    key = (lambda row: row[2]) if timed else (lambda row: row[1])
+    return sorted(rows, key=key, reverse=True)[:top], timed
+
+
+def format_report(rows, source=None, top=20):
+    ranked, timed = rank(rows, top)
+    total_count = sum(count for _, count, _ in rows) or 1
+    total_cycles = sum(cycles for _, _, cycles in rows) or 1
+    out = [f"{'line':>8} {'count':>14} {'count %':>8}" + (f" {'cycles':>16} {'time %':>7}" if timed else "")
+           + "  source"]
+    for line, count, cycles in ranked:
+        text = f"{line:>8} {count:>14} {100.0 * count / total_count:>7.2f}%"
+        if timed:
+            text += f" {cycles:>16} {100.0 * cycles / total_cycles:>6.2f}%"
+        if source:
+            text += "  " + source.get(line, "")
+        out.append(text)
+    return "\n".join(out)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Rank hot BASIC lines from a profile.")
+    arg_parser.add_argument('profile', nargs='?', default='basic_profile.txt')
+    arg_parser.add_argument('--source', help="BASIC file, to show the text of each line")
+    arg_parser.add_argument('--top', type=int, default=20)
+    args = arg_parser.parse_args()
+
+    source = read_source_lines(args.source) if args.source else None
+    print(format_report(read_profile(args.profile), source, args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# range_analysis.py
+
+from astt import *
+from ast_utils import COMPARISON_OPS, c_div, target_name, walk_statements
+
+INT_MIN, INT_MAX = -2**31, 2**31 - 1
+LLONG_MIN, LLONG_MAX = -2**63, 2**63 - 1
+
+# Candidate C types, cheapest first. A variable gets the first one whose
+# range covers every value the analysis says it can hold.
+C_TYPES = [
+    ('unsigned char', 0, 255),
+    ('signed char', -128, 127),
+    ('unsigned short', 0, 65535),
+    ('short', -32768, 32767),
+    ('int', INT_MIN, INT_MAX),
+    ('long long', LLONG_MIN, LLONG_MAX),
+]
+
+# Range of a value that has not been computed yet (bottom of the lattice).
+# Unknown ranges (top) are represented by None.
+EMPTY = ()
+
+
+def hull(a, b):
+    if a is EMPTY:
+        return b
+    if b is EMPTY:
+        return a
+    if a is None or b is None:
+        return None
+    return (min(a[0], b[0]), max(a[1], b[1]))
+
+
+def fits(r, lo, hi):
+    return r is not None and r is not EMPTY and lo <= r[0] and r[1] <= hi
+
+
+def choose_type(r):
+    """Returns the cheapest C type able to hold every value in range r."""
+    for ctype, lo, hi in C_TYPES:
+        if fits(r, lo, hi):
+            return ctype
+    # Unknown range: keep the historical 'int' behaviour
+    return 'int'
+
+
+class RangeAnalyzer:
+    """Flow-insensitive value-range analysis over a whole Program.
+
+    Each variable's range is the hull of 0 and every value assigned to it
+    by LET, INPUT and FOR: the generated C zero-initializes every scalar,
+    and a variable may be read before its first assignment. All elements
+    of an array share one range, kept under NAME(), as arrays are zeroed
+    storage too. The
+    analysis iterates to a fixpoint; variables that are still growing
+    after MAX_PASSES are widened to unknown.
+
+    local_ranges holds tighter ranges that only hold at some point of the
+    program, such as a FOR variable inside its loop body; expr_range uses
+    them in place of the whole-program ranges.
+    """
+
+    MAX_PASSES = 8
+
+    def __init__(self):
+        self.ranges = {}
+        self.local_ranges = {}
+        self.assigned = set()
+        self.changed = False
+        self.widen = False
+
+    def analyze(self, program):
+        for stmt in walk_statements(program.statements):
+            if isinstance(stmt, (LetStatement, InputStatement)):
+                self.assigned.add(target_name(stmt.variable))
+            elif isinstance(stmt, ForStatement):
+                self.assigned.add(stmt.var.name)
+            elif isinstance(stmt, DimStatement):
+                self.assigned.update(name + '()' for name in stmt.arrays)
+        for name in self.assigned:
+            self.ranges[name] = (0, 0)
+
+        passes = 0
+        while True:
+            self.changed = False
+            self.widen = passes >= self.MAX_PASSES
+            for labeled in program.statements:
+                self.visit(labeled.statement)
+            passes += 1
+            if not self.changed:
+                return self.ranges
+
+    def assign(self, name, r):
+        if r is EMPTY:
+            return
+        if name not in self.ranges:
+            self.ranges[name] = r
+            self.changed = True
+            return
+        old = self.ranges[name]
+        new = hull(old, r)
+        if new != old:
+            self.ranges[name] = None if self.widen else new
+            self.changed = True
+
+    def visit(self, node):
+        method_name = 'visit_' + type(node).__name__
+        visitor = getattr(self, method_name, None)
+        if visitor:
+            visitor(node)
+
+    def visit_LetStatement(self, node):
+        self.assign(target_name(node.variable), self.expr_range(node.expr))
+
+    def visit_InputStatement(self, node):
+        # Read with scanf("%d"), so any int can arrive
+        self.assign(target_name(node.variable), (INT_MIN, INT_MAX))
+
+    def visit_IfStatement(self, node):
+        self.visit(node.then_branch)
+        if node.else_branch:
+            self.visit(node.else_branch)
+
+    def visit_BlockStatement(self, node):
+        for labeled in node.statements:
+            self.visit(labeled.statement)
+
+    def visit_WhileStatement(self, node):
+        for labeled in node.body:
+            self.visit(labeled.statement)
+
+    visit_DoWhileStatement = visit_WhileStatement
+
+    def visit_ForStatement(self, node):
+        start = self.expr_range(node.start)
+        end = self.expr_range(node.end)
+        step = self.expr_range(node.step)
+        r = hull(start, end)
+        if r is EMPTY or step is EMPTY:
+            pass
+        elif r is None or step is None:
+            r = None
+        else:
+            # The loop exits one step past the bound
+            r = (r[0] + min(step[0], 0), r[1] + max(step[1], 0))
+        self.assign(node.var.name, r)
+        for stmt in node.body:
+            self.visit(stmt)
+
+    def expr_range(self, expr):
+        """Returns (lo, hi) for an expression, None if unknown, EMPTY if not yet known."""
+        if isinstance(expr, Number):
+            return (expr.value, expr.value)
+        if isinstance(expr, (Variable, ArrayRef)):
+            name = target_name(expr)
+            if name in self.local_ranges:
+                return self.local_ranges[name]
+            if name not in self.assigned:
+                return None
+            return self.ranges.get(name, EMPTY)
+        if isinstance(expr, BinaryOp):
+            if expr.op in COMPARISON_OPS:
+                return (0, 1)
+            left = self.expr_range(expr.left)
+            right = self.expr_range(expr.right)
+            if left is EMPTY or right is EMPTY:
+                return EMPTY
+            if left is None or right is None:
+                return None
+            r = self.binary_range(expr.op, left, right)
+            if r is None or r[0] < LLONG_MIN or r[1] > LLONG_MAX:
+                return None
+            return r
+        return None
+
+    def binary_range(self, op, a, b):
+        if op == '+':
+            return (a[0] + b[0], a[1] + b[1])
+        if op == '-':
+            return (a[0] - b[1], a[1] - b[0])
+        if op == '*':
+            corners = [x * y for x in a for y in b]
+            return (min(corners), max(corners))
+        if op == '/':
+            # Split the divisor around zero; a zero-only divisor is unknown
+            divisors = []
+            if b[0] <= -1:
+                divisors.append((b[0], min(b[1], -1)))
+            if b[1] >= 1:
+                divisors.append((max(b[0], 1), b[1]))
+            if not divisors:
+                return None
+            values = [c_div(x, y) for x in a for d in divisors for y in d]
+            return (min(values), max(values))
+        return None
@@ -0,0 +1,247 @@
+# runner_pool.py
+# Runs one compiled BASIC program against many inputs through a pool of
+# long-lived worker processes.
+#
+# Each worker is the program built with fork_server=True: it stays loaded and
+# forks a fresh copy of itself per input (see c_runtime.FORK_SERVER), so a
+# run costs a fork instead of an exec and dynamic loading. With
+# fork_server=False (and on Windows, which has no fork) every input spawns
+# the binary instead; the pool still runs `workers` of them at a time.
+#
+# Usage: python runner_pool.py FILE.bas INPUT_FILE... [--workers N]
+#            [--timeout SECONDS] [--spawn]
+
+import argparse
+import os
+import queue
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from main import compile_basic_to_c
+
+DEFAULT_TIMEOUT = 10.0
+
+
+class RunResult:
+    """Output and exit status of one run. exit_code is negative when the
+    program was killed by a signal, and None when the worker itself failed."""
+
+    def __init__(self, output, exit_code, seconds=0.0, timed_out=False):
+        self.output = output
+        self.exit_code = exit_code
+        self.seconds = seconds
+        self.timed_out = timed_out
+
+    @property
+    def status(self):
+        if self.timed_out:
+            return 'timeout'
+        if self.exit_code is None:
+            return 'worker failed'
+        if self.exit_code < 0:
+            return f"signal {-self.exit_code}"
+        if self.exit_code:
+            return f"exit code {self.exit_code}"
+        return 'ok'
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class RunStats:
+    """Throughput over the whole batch and the latency of single runs."""
+
+    def __init__(self, results, wall_seconds):
+        latencies = sorted(r.seconds for r in results)
+        self.runs = len(results)
+        self.failures = sum(1 for r in results if r.status != 'ok')
+        self.wall_seconds = wall_seconds
+        self.throughput = self.runs / wall_seconds if wall_seconds > 0 else 0.0
+        self.p50_ms = percentile(latencies, 0.50) * 1000
+        self.p90_ms = percentile(latencies, 0.90) * 1000
+        self.p99_ms = percentile(latencies, 0.99) * 1000
+        self.max_ms = latencies[-1] * 1000 if latencies else 0.0
+
+    def summary(self):
+        return (f"{self.runs} runs ({self.failures} failed) in {self.wall_seconds * 1000:.1f} ms: "
+                f"{self.throughput:.0f} runs/s, latency p50 {self.p50_ms:.2f} ms, "
+                f"p90 {self.p90_ms:.2f} ms, p99 {self.p99_ms:.2f} ms, max {self.max_ms:.2f} ms")
+
+
+class ForkServerWorker:
+    """One fork server process, fed framed requests over its stdin/stdout pipes."""
+
+    def __init__(self, exe_path):
+        self.process = subprocess.Popen([exe_path], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def run(self, data, timeout):
+        timeout_ms = max(1, int(timeout * 1000)) if timeout else 0
+        try:
+            self.process.stdin.write(f"{len(data)} {timeout_ms}\n".encode() + data)
+            self.process.stdin.flush()
+            header = self.process.stdout.readline()
+        except (BrokenPipeError, OSError):
+            header = b""
+        if not header:
+            return None
+        exit_code, size = (int(x) for x in header.split())
+        output = self.process.stdout.read(size)
+        if len(output) < size:
+            return None  # The server died while sending the output
+        # The server arms SIGALRM in the child for the timeout
+        return RunResult(output, exit_code, timed_out=exit_code == -signal.SIGALRM)
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            self.kill()
+
+    def kill(self):
+        self.process.kill()
+        self.process.wait()
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass  # Unflushed input to a dead process
+
+
+class SpawnWorker:
+    """Starts the binary once per input."""
+
+    def __init__(self, exe_path):
+        self.exe_path = exe_path
+
+    def run(self, data, timeout):
+        try:
+            proc = subprocess.run([self.exe_path], input=data, stdout=subprocess.PIPE, timeout=timeout)
+        except subprocess.TimeoutExpired as e:
+            return RunResult(e.output or b"", None, timed_out=True)
+        return RunResult(proc.stdout, proc.returncode)
+
+    def close(self):
+        pass
+
+    def kill(self):
+        pass
+
+
+class RunnerPool:
+    """Runs inputs (bytes for stdin) on `workers` workers at a time.
+
+    run() is safe to call from several threads; map() runs a batch and
+    returns the results in input order together with their RunStats. A fork
+    server that dies or fails mid-request is killed, its run reported as
+    'worker failed', and a new one started for the next run in its place.
+    """
+
+    def __init__(self, exe_path, workers=None, timeout=DEFAULT_TIMEOUT, fork_server=None):
+        if fork_server is None:
+            fork_server = os.name != 'nt'
+        self.exe_path = exe_path
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.fork_server = fork_server
+        self.idle = queue.Queue()
+        for _ in range(self.workers):
+            self.idle.put(self.new_worker())
+
+    def new_worker(self):
+        if self.fork_server:
+            return ForkServerWorker(self.exe_path)
+        return SpawnWorker(self.exe_path)
+
+    def run(self, data):
+        # None marks a slot whose worker failed; it is started again here, so
+        # a replacement that cannot start never shrinks the pool
+        worker = self.idle.get()
+        start = time.perf_counter()
+        result = None
+        try:
+            if worker is None:
+                worker = self.new_worker()
+            result = worker.run(data, self.timeout)
+        except Exception:
+            pass  # A failed start, broken pipe or garbled frame counts as a failed run
+        finally:
+            if result is None and worker is not None:
+                # Its request/reply framing may be out of sync, so never reuse it
+                worker.kill()
+                worker = None
+            self.idle.put(worker)
+        if result is None:
+            result = RunResult(b"", None)
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def map(self, inputs):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(self.workers) as executor:
+            results = list(executor.map(self.run, inputs))
+        return results, RunStats(results, time.perf_counter() - start)
+
+    def close(self):
+        while not self.idle.empty():
+            worker = self.idle.get()
+            if worker is not None:
+                worker.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build(basic_code, workdir, fork_server=None, gcc_flags=("-O2",), **options):
+    """Compiles BASIC source to a binary in workdir and returns its path."""
+    if fork_server is None:
+        fork_server = os.name != 'nt'
+    c_path = os.path.join(workdir, "program.c")
+    exe_path = os.path.join(workdir, "program" + (".exe" if os.name == 'nt' else ".out"))
+    with open(c_path, 'w') as f:
+        f.write(compile_basic_to_c(basic_code, fork_server=fork_server, **options))
+    subprocess.run(["gcc", *gcc_flags, c_path, "-o", exe_path], check=True)
+    return exe_path
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Run a BASIC program against many inputs.")
+    arg_parser.add_argument('source')
+    arg_parser.add_argument('inputs', nargs='+', help="files fed to the program's stdin, one run each")
+    arg_parser.add_argument('--workers', type=int, default=None)
+    arg_parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT)
+    arg_parser.add_argument('--spawn', action='store_true', help="start the binary once per input")
+    args = arg_parser.parse_args()
+
+    with open(args.source, 'r') as f:
+        basic_code = f.read()
+    inputs = []
+    for path in args.inputs:
+        with open(path, 'rb') as f:
+            inputs.append(f.read())
+
+    fork_server = False if args.spawn else None
+    with tempfile.TemporaryDirectory() as workdir:
+        exe_path = build(basic_code, workdir, fork_server=fork_server)
+        with RunnerPool(exe_path, args.workers, args.timeout, fork_server) as pool:
+            results, stats = pool.map(inputs)
+
+    for path, result in zip(args.inputs, results):
+        if result.status != 'ok':
+            print(f"{path}: {result.status}", file=sys.stderr)
+    print(stats.summary())
+    return 1 if stats.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+# shard_generator.py
+# Splits the generated C across several translation units so that huge
+# programs build in parallel and gcc never sees one giant main().
+
+import re
+
+from astt import *
+from ast_utils import constant_value, jump_targets, walk_statements
+from code_generator import CodeGenerator
+from c_runtime import BOUNDS_CHECK, FAST_IO, FORK_SERVER
+from inliner import TERMINATORS
+
+DEFAULT_SHARDS = 4
+
+# Prototypes for the runtime once it is compiled by itself in runtime.c
+FAST_IO_DECLARATIONS = """\
+void rt_flush(void);
+void rt_print_str(const char *s, size_t n);
+void rt_print_int(long long v);
+extern long long rt_in;
+int rt_read_int(void);"""
+
+BOUNDS_CHECK_DECLARATIONS = "long long rt_index(long long i, int size, const char *name);"
+
+MAKEFILE = """\
+CC ?= gcc
+CFLAGS ?= -O2
+OBJS = {objects}
+
+program: $(OBJS)
+\t$(CC) $(CFLAGS) -o $@ $(OBJS)
+
+%.o: %.c program.h
+\t$(CC) $(CFLAGS) -c $<
+
+clean:
+\trm -f program $(OBJS)
+"""
+
+
+def shared_runtime(code):
+    """Runtime C with its file-local definitions made visible to the other files."""
+    return re.sub(r"^static ", "", code.strip("\n"), flags=re.MULTILINE)
+
+
+def breaks_out(statements):
+    """True if a BREAK in the statements leaves the loop they are the body of."""
+    for stmt in statements:
+        if isinstance(stmt, LabeledStatement):
+            stmt = stmt.statement
+        if isinstance(stmt, BreakStatement):
+            return True
+        if isinstance(stmt, IfStatement):
+            branches = [stmt.then_branch] + ([stmt.else_branch] if stmt.else_branch else [])
+            if breaks_out(branches):
+                return True
+        elif isinstance(stmt, BlockStatement) and breaks_out(stmt.statements):
+            return True
+    return False
+
+
+def falls_through(stmt):
+    """False if control never reaches the line after stmt, e.g. a while (1)
+    loop left only by GOTO or RETURN."""
+    if isinstance(stmt, TERMINATORS):
+        return False
+    if isinstance(stmt, WhileStatement) and constant_value(stmt.condition):
+        return breaks_out(stmt.body)
+    return True
+
+
+def successors(items, i, first_index):
+    """Indexes of the top-level lines control can reach from line i without a GOSUB
+    (len(items) stands for running off the end)."""
+    out = set()
+    for stmt in walk_statements([items[i]]):
+        if isinstance(stmt, GotoStatement) and stmt.target in first_index:
+            out.add(first_index[stmt.target])
+    if falls_through(items[i].statement):
+        out.add(i + 1)
+    return out
+
+
+def reachable(items, starts, first_index):
+    seen = set()
+    pending = list(starts)
+    while pending:
+        i = pending.pop()
+        if i in seen or i == len(items):
+            seen.add(i)
+            continue
+        seen.add(i)
+        pending.extend(successors(items, i, first_index))
+    return seen
+
+
+def find_subroutines(items):
+    """Returns {target: sorted line indexes} for the GOSUB subroutines that can
+    become C functions: everything reachable from the target before RETURN,
+    not running off the end, shared with no other code and calling only such
+    subroutines."""
+    first_index = {}
+    for i, item in enumerate(items):
+        first_index.setdefault(item.number, i)
+    calls = {}
+    regions = {}
+    for stmt in walk_statements(items):
+        if isinstance(stmt, GosubStatement) and stmt.target in first_index:
+            regions.setdefault(stmt.target, None)
+    for target in regions:
+        region = reachable(items, [first_index[target]], first_index)
+        if len(items) not in region:
+            regions[target] = region
+            calls[target] = {stmt.target for stmt in walk_statements([items[i] for i in region])
+                             if isinstance(stmt, GosubStatement)}
+
+    clean = {target for target, region in regions.items() if region is not None}
+    while True:
+        # Lines of main, including subroutines that keep using the return stack
+        starts = [0] + [first_index[t] for t in regions if t not in clean]
+        owner = {i: None for i in reachable(items, starts, first_index)}
+        shared = set()
+        for target in clean:
+            for i in regions[target]:
+                if i in owner:
+                    shared.add(owner[i])
+                    shared.add(target)
+                owner[i] = target
+        dropped = {t for t in clean if t in shared or not calls[t] <= clean}
+        if not dropped:
+            return {target: sorted(regions[target]) for target in clean}
+        clean -= dropped
+
+
+class ShardedCodeGenerator(CodeGenerator):
+    """Generates a program as several C files for a parallel build.
+
+    Subroutines found by find_subroutines become functions sub_N in
+    shard files; GOSUB calls them, RETURN returns from them and END inside
+    them exits. Other subroutines stay in main with the return stack.
+    Variables and arrays turn into globals declared in program.h, and the
+    fast_io/bounds-check runtime is compiled once in runtime.c.
+
+    generate() returns {file name: contents}, including a Makefile.
+    """
+
+    def __init__(self, shards=DEFAULT_SHARDS, **options):
+        if options.get('profile') or options.get('profile_cycles'):
+            raise ValueError("Profiling is not supported for sharded builds")
+        super().__init__(**options)
+        self.shards = shards
+        self.subroutines = {}
+        self.in_subroutine = False
+
+    def generate(self, program):
+        items = program.statements
+        self.subroutines = find_subroutines(items)
+        in_function = {i for region in self.subroutines.values() for i in region}
+
+        targets = jump_targets(items)
+        goto_targets = {stmt.target for stmt in walk_statements(items)
+                        if isinstance(stmt, GotoStatement)}
+        self.label_required = {t for t in targets if t in goto_targets or t not in self.subroutines}
+        main_items = [item for i, item in enumerate(items) if i not in in_function]
+        for stmt in walk_statements(main_items):
+            if isinstance(stmt, GosubStatement) and stmt.target not in self.subroutines:
+                self.return_stack_used = True
+                self.return_sites += 1
+            elif isinstance(stmt, ReturnStatement):
+                self.return_stack_used = True
+        self.analyze(program)
+
+        functions = {}
+        for target, region in sorted(self.subroutines.items()):
+            # Each function starts a new buffer, so #line mapping starts over
+            self.output = []
+            self.mapped_line = None
+            self.in_subroutine = True
+            self.emit_lines([items[i] for i in region])
+            functions[target] = self.output
+        self.in_subroutine = False
+        self.output = []
+        self.mapped_line = None
+        if self.fast_io:
+            self.emit("atexit(rt_flush);")
+        self.emit_lines(main_items)
+        self.emit("return 0;")
+        main_body = self.output
+
+        files = {}
+        shards = self.assign_shards(functions)
+        for k, shard in enumerate(shards, 1):
+            lines = ['#include "program.h"']
+            for target in shard:
+                lines.append("")
+                lines.append(f"void sub_{target}(void) {{")
+                lines.extend(functions[target])
+                lines.append("}")
+            files[f"shard{k}.c"] = "\n".join(lines) + "\n"
+
+        lines = ['#include "program.h"', ""]
+        lines.extend(self.declarations())
+        for name in sorted(self.arrays):
+            lines.append(f"{self.var_type(name + '()')} arr_{name}[{self.arrays[name] + 1}];")
+        if self.return_stack_used:
+            lines.append("static int return_stack[100];")
+            lines.append("static int sp = -1;")
+        lines.append("")
+        lines.append("static int basic_main(void) {" if self.fork_server else "int main() {")
+        lines.extend(main_body)
+        lines.append("}")
+        if self.fork_server:
+            lines.extend(FORK_SERVER.rstrip("\n").split("\n"))
+        files["main.c"] = "\n".join(lines) + "\n"
+
+        runtime = []
+        if self.fast_io:
+            runtime.append(shared_runtime(FAST_IO))
+        if self.bounds_checked:
+            runtime.append(shared_runtime(BOUNDS_CHECK))
+        if runtime:
+            files["runtime.c"] = '#include "program.h"\n\n' + "\n\n".join(runtime) + "\n"
+
+        files["program.h"] = self.header()
+        objects = " ".join(name[:-2] + ".o" for name in files if name.endswith(".c"))
+        files["Makefile"] = MAKEFILE.format(objects=objects)
+        return files
+
+    def assign_shards(self, functions):
+        """Spreads the functions over the shards, largest first onto the smallest shard."""
+        count = min(self.shards, len(functions))
+        shards = [[] for _ in range(count)]
+        sizes = [0] * count
+        for target in sorted(functions, key=lambda t: -len(functions[t])):
+            k = sizes.index(min(sizes))
+            shards[k].append(target)
+            sizes[k] += len(functions[target])
+        return [sorted(shard) for shard in shards]
+
+    def header(self):
+        lines = ["#ifndef PROGRAM_H", "#define PROGRAM_H", "",
+                 "#include <stdio.h>", "#include <stdlib.h>", ""]
+        if self.fast_io:
+            lines.append(FAST_IO_DECLARATIONS)
+        if self.bounds_checked:
+            lines.append(BOUNDS_CHECK_DECLARATIONS)
+        lines.extend("extern " + declaration for declaration in self.declarations(initialize=False))
+        for name in sorted(self.arrays):
+            lines.append(f"extern {self.var_type(name + '()')} arr_{name}[{self.arrays[name] + 1}];")
+        for target in sorted(self.subroutines):
+            lines.append(f"void sub_{target}(void);")
+        lines.extend(["", "#endif"])
+        return "\n".join(lines) + "\n"
+
+    def visit_GosubStatement(self, node):
+        if node.target in self.subroutines:
+            self.emit(f"sub_{node.target}();")
+        else:
+            super().visit_GosubStatement(node)
+
+    def visit_ReturnStatement(self, node):
+        if self.in_subroutine:
+            self.emit("return;")
+        else:
+            super().visit_ReturnStatement(node)
+
+    def visit_EndStatement(self, node):
+        if self.in_subroutine:
+            self.emit("exit(0);")
+        else:
+            super().visit_EndStatement(node)
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    from main import compile_basic_to_shards
+
+    if len(sys.argv) not in (3, 4):
+        print("Usage: python shard_generator.py FILE.bas OUT_DIR [SHARDS]", file=sys.stderr)
+        sys.exit(2)
+    with open(sys.argv[1], 'r') as f:
+        basic_code = f.read()
+    shards = int(sys.argv[3]) if len(sys.argv) == 4 else DEFAULT_SHARDS
+    os.makedirs(sys.argv[2], exist_ok=True)
+    for name, text in compile_basic_to_shards(basic_code, shards).items():
+        with open(os.path.join(sys.argv[2], name), 'w') as f:
+            f.write(text)
+    print(f"Wrote {sys.argv[2]}; build with make -j")
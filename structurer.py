@@ -0,0 +1,163 @@
+# structurer.py
+
+from astt import *
+from ast_utils import jump_targets
+
+# Comparison -> its negation, used to turn "IF c THEN GOTO exit" into while (!c)
+NEGATED_OPS = {'=': '<>', '<>': '=', '<': '>=', '>=': '<', '>': '<=', '<=': '>'}
+
+
+def negate(condition):
+    if isinstance(condition, BinaryOp) and condition.op in NEGATED_OPS:
+        return BinaryOp(condition.left, NEGATED_OPS[condition.op], condition.right)
+    return BinaryOp(condition, '=', Number(0))
+
+
+def goto_target(stmt):
+    """Returns (target, condition) for GOTO and IF ... THEN GOTO without ELSE, else None."""
+    if isinstance(stmt, GotoStatement):
+        return stmt.target, None
+    if (isinstance(stmt, IfStatement) and stmt.else_branch is None
+            and isinstance(stmt.then_branch, GotoStatement)):
+        return stmt.then_branch.target, stmt.condition
+    return None
+
+
+def labeled(number, node, original):
+    """Wraps a built node, keeping the source position of the statement it replaces."""
+    if original is not None:
+        node.line, node.source_line = original.line, original.source_line
+    return LabeledStatement(number, node)
+
+
+class Structurer:
+    """Rebuilds while/do-while loops and if/else blocks from GOTO control flow.
+
+    Works on the top-level line list, recursively on the regions it builds:
+
+    - A line targeted by a later GOTO in the same region is a loop head. The
+      loop runs up to the last such back edge: an unconditional GOTO makes a
+      while loop (with the head's "IF c THEN GOTO exit" as its condition when
+      it has one), a conditional one makes a do-while.
+      Inside the loop, GOTO to the exit becomes break and GOTO to the head of a
+      while loop becomes continue.
+    - "IF c THEN GOTO X" with X later in the region makes an if block around
+      the lines it skips; if the skipped lines end in "GOTO Y" with Y further
+      on, the lines from X to Y become the other branch.
+
+    Every other jump stays a goto. Labels are kept on all lines, so jumps into
+    a built block remain valid C with the original meaning; a consumed back
+    edge that is itself a jump target stays in the body as a labeled continue,
+    and a targeted GOTO closing a diamond stays in its branch.
+    """
+
+    def __init__(self):
+        self.loops = 0
+        self.branches = 0
+        self.targets = set()
+
+    def run(self, program):
+        self.targets = jump_targets(program.statements)
+        program.statements = self.structure(program.statements, None)
+        return program
+
+    def structure(self, items, loop):
+        """Structures a list of LabeledStatements. loop is (head, exit, allow_continue) or None."""
+        first_index = {}
+        last_jump = {}
+        for i, item in enumerate(items):
+            first_index.setdefault(item.number, i)
+            jump = goto_target(item.statement)
+            if jump:
+                last_jump[jump[0]] = i
+
+        out = []
+        i = 0
+        while i < len(items):
+            item = items[i]
+            built = None
+            if first_index[item.number] == i:
+                built = self.build_loop(items, i, last_jump)
+            if built is None:
+                built = self.build_branch(items, i, first_index, loop)
+            if built is not None:
+                node, i = built
+                out.append(node)
+                continue
+            out.append(self.rewrite_jump(item, loop))
+            i += 1
+        return out
+
+    def build_loop(self, items, i, last_jump):
+        head = items[i].number
+        back = last_jump.get(head)
+        if back is None or back <= i:
+            return None
+
+        target, condition = goto_target(items[back].statement)
+        exit_number = items[back + 1].number if back + 1 < len(items) else None
+        self.loops += 1
+
+        # Loops whose body starts with the head line leave its position to the body
+        position = None
+        if condition is not None:
+            # IF c THEN GOTO head at the bottom: do { ... } while (c)
+            body = self.structure(items[i:back], (head, exit_number, False))
+            node = DoWhileStatement(body, condition)
+        else:
+            first = goto_target(items[i].statement)
+            if first and first[1] is not None and exit_number is not None and first[0] == exit_number:
+                # IF c THEN GOTO exit at the top: while (!c) { ... }
+                body = self.structure(items[i + 1:back], (head, exit_number, True))
+                node = WhileStatement(negate(first[1]), body)
+                position = items[i].statement
+            else:
+                body = self.structure(items[i:back], (head, exit_number, True))
+                node = WhileStatement(Number(1), body)
+        if items[back].number in self.targets:
+            # Jumping to the back edge starts the next iteration in every loop form
+            body.append(labeled(items[back].number, ContinueStatement(), items[back].statement))
+        return labeled(head, node, position), back + 1
+
+    def build_branch(self, items, i, first_index, loop):
+        jump = goto_target(items[i].statement)
+        if not jump or jump[1] is None:
+            return None
+        target, condition = jump
+        k = first_index.get(target)
+        if k is None or k <= i + 1 or (loop and target in (loop[0], loop[1])):
+            return None
+
+        self.branches += 1
+        number = items[i].number
+        skipped = items[i + 1:k]
+        last = goto_target(skipped[-1].statement)
+        m = first_index.get(last[0]) if last and last[1] is None else None
+        if m is not None and m > k and not (loop and last[0] in (loop[0], loop[1])):
+            # Diamond: IF c THEN GOTO X / A / GOTO Y / X: B / Y:
+            then_block = BlockStatement(self.structure(items[k:m], loop))
+            # The closing GOTO Y is implied by the if, unless other code jumps to it
+            if skipped[-1].number not in self.targets:
+                skipped = skipped[:-1]
+            else_block = BlockStatement(self.structure(skipped, loop))
+            return labeled(number, IfStatement(condition, then_block, else_block), items[i].statement), m
+
+        block = BlockStatement(self.structure(skipped, loop))
+        return labeled(number, IfStatement(negate(condition), block), items[i].statement), k
+
+    def rewrite_jump(self, item, loop):
+        """Turns jumps to the enclosing loop's exit or head into break/continue."""
+        jump = goto_target(item.statement)
+        if not jump or not loop:
+            return item
+        target, condition = jump
+        head, exit_number, allow_continue = loop
+        if target == exit_number:
+            replacement = BreakStatement()
+        elif target == head and allow_continue:
+            replacement = ContinueStatement()
+        else:
+            return item
+        if condition is not None:
+            replacement = IfStatement(condition, replacement)
+        return labeled(item.number, replacement, item.statement)
@@ -19,6 +19,7 @@ TOKEN_TYPES = {
     'INPUT': 'INPUT',
     'REM': 'REM',  # Comment
     'END': 'END',
+    'DIM': 'DIM',
 
     # Operators
     'PLUS': '+',
@@ -0,0 +1,210 @@
+# unroller.py
+
+from astt import *
+from ast_utils import assigned_variables, constant_value, fold_constants, walk_statements
+
+# A loop is fully unrolled when it runs at most MAX_TRIPS times and the copies
+# hold at most MAX_SIZE statements; otherwise its body is repeated FACTOR times
+# per iteration when that stays within MAX_SIZE
+MAX_TRIPS = 16
+MAX_SIZE = 64
+FACTOR = 4
+
+
+def trip_count(start, end, step):
+    """Number of iterations of for (v = start; v <= end (>= for step < 0); v += step)."""
+    if step > 0:
+        return max(0, (end - start) // step + 1)
+    return max(0, (start - end) // -step + 1)
+
+
+def substitute(expr, name, replacement):
+    """Returns expr with the variable `name` replaced, folding what becomes constant."""
+    if isinstance(expr, Variable) and expr.name == name:
+        return replacement
+    if isinstance(expr, ArrayRef):
+        index = substitute(expr.index, name, replacement)
+        return expr if index is expr.index else ArrayRef(expr.name, index)
+    if isinstance(expr, BinaryOp):
+        left = substitute(expr.left, name, replacement)
+        right = substitute(expr.right, name, replacement)
+        if left is not expr.left or right is not expr.right:
+            return fold_constants(BinaryOp(left, expr.op, right))
+    return expr
+
+
+def offset(name, delta):
+    """The expression name + delta."""
+    if delta == 0:
+        return Variable(name)
+    if delta < 0:
+        return BinaryOp(Variable(name), '-', Number(-delta))
+    return BinaryOp(Variable(name), '+', Number(delta))
+
+
+def positioned(node, original):
+    node.line, node.source_line = original.line, original.source_line
+    return node
+
+
+class LoopUnroller:
+    """Unrolls FOR loops whose start, end and step are constants.
+
+    The body may not assign the loop variable or contain GOTO, GOSUB or
+    RETURN, since the copies no longer keep the variable up to date:
+
+    - Loops with a small trip count are replaced by one copy of the body
+      per iteration, with the loop variable substituted as a constant and
+      the result folded. An IF whose condition becomes constant keeps only
+      the branch that runs.
+    - Longer loops step FACTOR iterations at a time, the body repeated
+      with the variable plus 0, 1, ... steps; the leftover iterations are
+      unrolled after the loop.
+
+    Either way the loop variable is finally set to the value the loop
+    would have left in it. Inner loops are handled first, and again after
+    substitution in case their bounds became constant.
+
+    Counts are kept in `unrolled` and `partially_unrolled`.
+    """
+
+    def __init__(self, max_trips=MAX_TRIPS, max_size=MAX_SIZE, factor=FACTOR):
+        self.max_trips = max_trips
+        self.max_size = max_size
+        self.factor = factor
+        self.unrolled = 0
+        self.partially_unrolled = 0
+
+    def run(self, program):
+        program.statements = self.unroll_lines(program.statements)
+        return program
+
+    def unroll_lines(self, items):
+        out = []
+        for item in items:
+            out.extend(LabeledStatement(item.number, stmt) for stmt in self.unroll(item.statement, item.number))
+        return out
+
+    def unroll_body(self, statements, number):
+        out = []
+        for stmt in statements:
+            out.extend(self.unroll(stmt, number))
+        return out
+
+    def unroll(self, stmt, number):
+        """Returns the statements that replace stmt."""
+        if isinstance(stmt, IfStatement):
+            stmt.then_branch = self.single(self.unroll(stmt.then_branch, number), stmt, number)
+            if stmt.else_branch:
+                stmt.else_branch = self.single(self.unroll(stmt.else_branch, number), stmt, number)
+        elif isinstance(stmt, BlockStatement):
+            stmt.statements = self.unroll_lines(stmt.statements)
+        elif isinstance(stmt, ForStatement):
+            stmt.body = self.unroll_body(stmt.body, number)
+            return self.unroll_for(stmt, number)
+        return [stmt]
+
+    def single(self, statements, original, number):
+        """Fits a statement list into a single statement slot, such as an IF branch."""
+        if len(statements) == 1:
+            return statements[0]
+        return positioned(BlockStatement([LabeledStatement(number, s) for s in statements]), original)
+
+    def unrollable(self, node):
+        start = constant_value(node.start)
+        end = constant_value(node.end)
+        step = constant_value(node.step)
+        if start is None or end is None or not step:
+            return None
+        assigned, opaque = assigned_variables(node.body)
+        if opaque or node.var.name in assigned:
+            return None
+        if any(isinstance(stmt, (GotoStatement, GosubStatement, ReturnStatement))
+               for stmt in walk_statements(node.body)):
+            return None
+        return start, end, step
+
+    def unroll_for(self, node, number):
+        bounds = self.unrollable(node)
+        if bounds is None:
+            return [node]
+        start, end, step = bounds
+        var = node.var.name
+        trips = trip_count(start, end, step)
+        size = sum(1 for stmt in walk_statements(node.body)
+                   if not isinstance(stmt, (RemStatement, NextStatement)))
+
+        # A loop with nothing to do only leaves its final value behind
+        if size == 0 or (trips <= self.max_trips and trips * size <= self.max_size):
+            self.unrolled += 1
+            out = []
+            for i in range(trips):
+                out.extend(self.copy_body(node.body, var, Number(start + i * step), number))
+            out.append(positioned(LetStatement(Variable(var), Number(start + trips * step)), node))
+            return out
+
+        if trips < 2 * self.factor or size * self.factor > self.max_size:
+            return [node]
+        self.partially_unrolled += 1
+        main_trips = trips - trips % self.factor
+        body = []
+        for k in range(self.factor):
+            body.extend(self.copy_body(node.body, var, offset(var, k * step), number))
+        main = positioned(ForStatement(Variable(var), Number(start),
+                                       Number(start + (main_trips - self.factor) * step),
+                                       Number(self.factor * step), body), node)
+        out = [main]
+        if main_trips < trips:
+            for i in range(main_trips, trips):
+                out.extend(self.copy_body(node.body, var, Number(start + i * step), number))
+            out.append(positioned(LetStatement(Variable(var), Number(start + trips * step)), node))
+        return out
+
+    def copy_body(self, statements, var, replacement, number):
+        out = []
+        for stmt in statements:
+            out.extend(self.copy(stmt, var, replacement, number))
+        # Loops inside may have constant bounds now
+        return self.unroll_body(out, number)
+
+    def copy(self, stmt, var, replacement, number):
+        """Returns fresh statements for one iteration of stmt, the loop variable replaced."""
+        if isinstance(stmt, LetStatement):
+            new = LetStatement(substitute(stmt.variable, var, replacement),
+                               substitute(stmt.expr, var, replacement))
+        elif isinstance(stmt, PrintStatement):
+            new = PrintStatement(substitute(stmt.expr, var, replacement))
+        elif isinstance(stmt, InputStatement):
+            new = InputStatement(substitute(stmt.variable, var, replacement))
+        elif isinstance(stmt, IfStatement):
+            condition = substitute(stmt.condition, var, replacement)
+            value = constant_value(condition)
+            if value is not None:
+                branch = stmt.then_branch if value else stmt.else_branch
+                return self.copy(branch, var, replacement, number) if branch else []
+            then_branch = self.single(self.copy(stmt.then_branch, var, replacement, number), stmt, number)
+            else_branch = None
+            if stmt.else_branch:
+                else_branch = self.single(self.copy(stmt.else_branch, var, replacement, number), stmt, number)
+            new = IfStatement(condition, then_branch, else_branch)
+        elif isinstance(stmt, ForStatement):
+            body = []
+            for inner in stmt.body:
+                body.extend(self.copy(inner, var, replacement, number))
+            new = ForStatement(stmt.var, substitute(stmt.start, var, replacement),
+                               substitute(stmt.end, var, replacement),
+                               substitute(stmt.step, var, replacement), body)
+        elif isinstance(stmt, BlockStatement):
+            statements = []
+            for labeled in stmt.statements:
+                statements.extend(LabeledStatement(labeled.number, s)
+                                  for s in self.copy(labeled.statement, var, replacement, number))
+            new = BlockStatement(statements)
+        elif isinstance(stmt, EndStatement):
+            new = EndStatement()
+        elif isinstance(stmt, DimStatement):
+            new = DimStatement(dict(stmt.arrays))
+        else:
+            # REM and NEXT do nothing once the loop is gone
+            return []
+        return [positioned(new, stmt)]
@@ -0,0 +1,188 @@
+# value_numbering.py
+
+from astt import *
+from ast_utils import constant_value, jump_targets, target_name
+
+# Operators whose operands can be swapped without changing the value
+COMMUTATIVE_OPS = ('+', '*', '=', '<>')
+
+
+def count_ops(expr):
+    if isinstance(expr, BinaryOp):
+        return 1 + count_ops(expr.left) + count_ops(expr.right)
+    return 0
+
+
+class ValueNumbering:
+    """Local value numbering over straight-line runs of statements.
+
+    A run ends at every GOTO/GOSUB target. Within a run, a BinaryOp that is
+    computed more than once with the same operand values is computed once
+    into a temporary (cse1, cse2, ...) which later occurrences read instead.
+    Assignments and INPUT invalidate values built from the assigned variable
+    (a store into an array, every element read from it); GOSUB invalidates
+    everything. FOR bodies are numbered as runs of their own.
+
+    The number of BinaryOp evaluations removed is kept in `eliminated`.
+    """
+
+    def __init__(self):
+        self.eliminated = 0
+        self.temp_count = 0
+
+    def run(self, program):
+        boundaries = jump_targets(program.statements)
+        statements = []
+        run = []
+        for labeled in program.statements:
+            # A jump lands on the first statement of a line, not on those passes put after it
+            if labeled.number in boundaries and run and run[-1].number != labeled.number:
+                statements.extend(self.number_run(run))
+                run = []
+            run.append(labeled)
+        statements.extend(self.number_run(run))
+        program.statements = statements
+        return program
+
+    def number_run(self, items):
+        counter = _RunNumbering(self)
+        counter.visit_items(items)
+        temps = {}
+        for key, count in counter.counts.items():
+            if count > 1:
+                self.temp_count += 1
+                temps[key] = f"cse{self.temp_count}"
+        return _RunNumbering(self, temps).visit_items(items)
+
+
+class _RunNumbering:
+    """One walk over a run. Without temps it only counts repeated values;
+    with temps it rewrites the run to use them."""
+
+    def __init__(self, owner, temps=None):
+        self.owner = owner
+        self.temps = temps
+        self.counts = {}
+        self.seen = set()
+        self.versions = {}
+        self.epoch = 0
+        self.pending = []
+
+    def visit_items(self, items):
+        out = []
+        for item in items:
+            self.pending = []
+            stmt = item.statement if isinstance(item, LabeledStatement) else item
+            self.visit(stmt, False)
+            for let in self.pending:
+                let.line, let.source_line = stmt.line, stmt.source_line
+            if isinstance(item, LabeledStatement):
+                out.extend(LabeledStatement(item.number, let) for let in self.pending)
+            else:
+                out.extend(self.pending)
+            out.append(item)
+        return out
+
+    def key(self, expr):
+        if isinstance(expr, Number):
+            return ('num', expr.value)
+        if isinstance(expr, Variable):
+            return ('var', expr.name, self.versions.get(expr.name, 0), self.epoch)
+        if isinstance(expr, ArrayRef):
+            # Any store into the array bumps the version of NAME()
+            name = target_name(expr)
+            return ('elem', name, self.key(expr.index), self.versions.get(name, 0), self.epoch)
+        if isinstance(expr, BinaryOp):
+            left = self.key(expr.left)
+            right = self.key(expr.right)
+            if expr.op in COMMUTATIVE_OPS and right < left:
+                left, right = right, left
+            return (expr.op, left, right)
+        return ('other', id(expr))
+
+    def value(self, expr, conditional):
+        """Counts or rewrites one expression. Values first computed under a
+        condition are never recorded, as they are not available on every path."""
+        if isinstance(expr, ArrayRef):
+            # Index expressions stay as written, so the code generator can
+            # still prove them in range from the loop variables they use
+            return expr
+        if not isinstance(expr, BinaryOp) or constant_value(expr) is not None:
+            return expr
+        key = self.key(expr)
+        if key in self.seen:
+            if self.temps is None:
+                self.counts[key] += 1
+                return expr
+            self.owner.eliminated += count_ops(expr)
+            return Variable(self.temps[key])
+
+        if not conditional:
+            self.seen.add(key)
+            if self.temps is None:
+                self.counts[key] = 1
+        left = self.value(expr.left, conditional)
+        right = self.value(expr.right, conditional)
+        if self.temps is None:
+            return expr
+        if left is expr.left and right is expr.right:
+            new = expr
+        else:
+            new = BinaryOp(left, expr.op, right)
+        if not conditional and key in self.temps:
+            temp = Variable(self.temps[key])
+            self.pending.append(LetStatement(temp, new))
+            return Variable(temp.name)
+        return new
+
+    def invalidate(self, name):
+        self.versions[name] = self.versions.get(name, 0) + 1
+
+    def visit(self, stmt, conditional):
+        if isinstance(stmt, LetStatement):
+            stmt.variable = self.value(stmt.variable, conditional)
+            stmt.expr = self.value(stmt.expr, conditional)
+            self.invalidate(target_name(stmt.variable))
+        elif isinstance(stmt, PrintStatement):
+            stmt.expr = self.value(stmt.expr, conditional)
+        elif isinstance(stmt, InputStatement):
+            stmt.variable = self.value(stmt.variable, conditional)
+            self.invalidate(target_name(stmt.variable))
+        elif isinstance(stmt, IfStatement):
+            stmt.condition = self.value(stmt.condition, conditional)
+            self.visit(stmt.then_branch, True)
+            if stmt.else_branch:
+                self.visit(stmt.else_branch, True)
+        elif isinstance(stmt, ForStatement):
+            stmt.start = self.value(stmt.start, conditional)
+            # The bounds are re-evaluated after the body has run
+            self.invalidate(stmt.var.name)
+            for inner in stmt.body:
+                self.visit_effects(inner)
+            stmt.end = self.value(stmt.end, True)
+            stmt.step = self.value(stmt.step, True)
+            if self.temps is not None:
+                stmt.body = self.owner.number_run(stmt.body)
+        elif isinstance(stmt, BlockStatement):
+            for labeled in stmt.statements:
+                self.visit(labeled.statement, conditional)
+        elif isinstance(stmt, GosubStatement):
+            self.epoch += 1
+
+    def visit_effects(self, stmt):
+        """Applies the invalidations of a statement without numbering its expressions."""
+        if isinstance(stmt, (LetStatement, InputStatement)):
+            self.invalidate(target_name(stmt.variable))
+        elif isinstance(stmt, IfStatement):
+            self.visit_effects(stmt.then_branch)
+            if stmt.else_branch:
+                self.visit_effects(stmt.else_branch)
+        elif isinstance(stmt, ForStatement):
+            self.invalidate(stmt.var.name)
+            for inner in stmt.body:
+                self.visit_effects(inner)
+        elif isinstance(stmt, BlockStatement):
+            for labeled in stmt.statements:
+                self.visit_effects(labeled.statement)
+        elif isinstance(stmt, GosubStatement):
+            self.epoch += 1
@@ -0,0 +1,273 @@
+# watch.py
+# Keeps every FILE.bas under a directory compiled to FILE.c while it is edited.
+#
+# Changes are picked up with inotify on Linux (through ctypes, no extra
+# packages) and by polling modification times elsewhere. A burst of saves is
+# debounced into one build, and a file is only recompiled when its content
+# hash differs from the last build, so touching or re-saving a file unchanged
+# costs nothing. The process stays up between builds, which keeps the
+# compiler modules loaded and the hashes in memory.
+#
+# Usage: python watch.py DIR [--gcc] [--poll] [--delay MS]
+
+import argparse
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import select
+import struct
+import subprocess
+import sys
+import time
+
+from main import compile_basic_to_c
+
+# Quiet time after the last change before building
+DEFAULT_DELAY = 0.03
+POLL_INTERVAL = 0.05
+
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def source_files(directory):
+    for root, dirs, files in os.walk(directory):
+        for name in files:
+            if name.endswith('.bas'):
+                yield os.path.join(root, name)
+
+
+class InotifySource:
+    """Changed paths from Linux inotify, watching every directory in the tree."""
+
+    def __init__(self, directory):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}
+        for root, _, _ in os.walk(directory):
+            self.add_watch(root)
+
+    def add_watch(self, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd >= 0:
+            self.directories[wd] = path
+
+    def wait(self, timeout):
+        """Paths changed within timeout seconds (None waits forever); empty if none."""
+        changed = set()
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return changed
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            path = os.path.join(self.directories.get(wd, ""), os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files may land in the new directory before it is watched
+                    self.add_watch(path)
+                    changed.update(source_files(path))
+            else:
+                changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingSource:
+    """Changed paths found by comparing modification times and sizes."""
+
+    def __init__(self, directory, interval=POLL_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self.stamps = self.scan()
+
+    def scan(self):
+        stamps = {}
+        for path in source_files(self.directory):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            stamps[path] = (st.st_mtime_ns, st.st_size)
+        return stamps
+
+    def wait(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            stamps = self.scan()
+            changed = {path for path in stamps.keys() | self.stamps.keys()
+                       if stamps.get(path) != self.stamps.get(path)}
+            self.stamps = stamps
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return changed
+            time.sleep(self.interval if deadline is None
+                       else max(0.0, min(self.interval, deadline - time.monotonic())))
+
+    def close(self):
+        pass
+
+
+def open_source(directory, poll=False):
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifySource(directory)
+        except (OSError, AttributeError):
+            pass  # No inotify (or no libc symbol): poll instead
+    return PollingSource(directory)
+
+
+class Watcher:
+    """Rebuilds FILE.c (and with gcc=True the FILE binary) for changed FILE.bas.
+
+    `hashes` maps each source to the SHA-256 of the content last built
+    successfully, so a save that does not change the file is skipped; build() returns
+    (path, status, milliseconds) for each file actually compiled.
+    """
+
+    def __init__(self, directory, gcc=False, gcc_flags=("-O2",), delay=DEFAULT_DELAY,
+                 poll=False, log=print, **options):
+        self.directory = directory
+        self.gcc = gcc
+        self.gcc_flags = list(gcc_flags)
+        self.delay = delay
+        self.poll = poll
+        self.log = log
+        self.options = options
+        self.hashes = {}
+
+    def initial_build(self):
+        """Builds the sources whose C output is missing or older; remembers every hash."""
+        stale = []
+        for path in sorted(source_files(self.directory)):
+            c_path = path[:-4] + ".c"
+            try:
+                if not os.path.exists(c_path) or os.path.getmtime(c_path) < os.path.getmtime(path):
+                    stale.append(path)
+                else:
+                    with open(path, 'rb') as f:
+                        self.hashes[path] = hashlib.sha256(f.read()).digest()
+            except OSError:
+                stale.append(path)  # build() reports it
+        return self.build(stale)
+
+    def build(self, paths):
+        results = []
+        for path in sorted(paths):
+            if not path.endswith('.bas'):
+                continue
+            start = time.perf_counter()
+            try:
+                with open(path, 'rb') as f:
+                    raw = f.read()
+            except FileNotFoundError:
+                self.hashes.pop(path, None)
+                continue
+            except OSError as e:
+                # Not hashed, so the next change retries it
+                self.hashes.pop(path, None)
+                status = f"read failed: {e.strerror or e}"
+            else:
+                source_hash = hashlib.sha256(raw).digest()
+                if self.hashes.get(path) == source_hash:
+                    continue
+                try:
+                    status = self.compile(path, raw.decode())
+                except UnicodeDecodeError as e:
+                    status = f"read failed: not UTF-8 ({e.reason} at byte {e.start})"
+                # Only a successful build is remembered, so re-saving a file
+                # that failed (say after fixing a gcc flag or a full disk) retries it
+                if status == "ok":
+                    self.hashes[path] = source_hash
+                else:
+                    self.hashes.pop(path, None)
+            elapsed = (time.perf_counter() - start) * 1000
+            results.append((path, status, elapsed))
+            self.log(f"{os.path.relpath(path, self.directory)}: {status} ({elapsed:.1f} ms)")
+        return results
+
+    def compile(self, path, basic_code):
+        try:
+            c_code = compile_basic_to_c(basic_code, **self.options)
+        except Exception as e:
+            return f"compilation failed: {e}"
+        c_path = path[:-4] + ".c"
+        try:
+            with open(c_path, 'w') as f:
+                f.write(c_code)
+        except OSError as e:
+            return f"write failed: {e.strerror or e}"
+        if not self.gcc:
+            return "ok"
+        exe_path = path[:-4] + (".exe" if os.name == 'nt' else "")
+        try:
+            proc = subprocess.run(["gcc", *self.gcc_flags, c_path, "-o", exe_path],
+                                  capture_output=True, text=True)
+        except OSError as e:
+            return f"gcc failed: {e.strerror or e}"
+        if proc.returncode != 0:
+            lines = proc.stderr.strip().splitlines()
+            return "gcc failed: " + (lines[-1] if lines else f"exit code {proc.returncode}")
+        return "ok"
+
+    def run(self, stop=None):
+        """Watches until interrupted, or until stop() returns true."""
+        self.initial_build()
+        source = open_source(self.directory, self.poll)
+        try:
+            while not (stop and stop()):
+                changed = source.wait(None if stop is None else 0.1)
+                if not changed:
+                    continue
+                # Debounce: wait until the burst of events settles
+                while True:
+                    more = source.wait(self.delay)
+                    if not more:
+                        break
+                    changed |= more
+                self.build(changed)
+        finally:
+            source.close()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Recompile BASIC files as they change.")
+    arg_parser.add_argument('directory')
+    arg_parser.add_argument('--gcc', action='store_true', help="also build each program with gcc")
+    arg_parser.add_argument('--poll', action='store_true', help="poll instead of using inotify")
+    arg_parser.add_argument('--delay', type=float, default=DEFAULT_DELAY * 1000,
+                            help="quiet time in ms before a burst of changes is built")
+    args = arg_parser.parse_args()
+
+    watcher = Watcher(args.directory, gcc=args.gcc, delay=args.delay / 1000, poll=args.poll)
+    print(f"Watching {args.directory} (Ctrl+C to stop)")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())